@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class EncyclopediaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'encyclopedia'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from .models import Comic
+        from .services import clear_comic_caches_on_commit
+
+        post_save.connect(clear_comic_caches_on_commit, sender=Comic, dispatch_uid="clear_comic_caches_on_save")
+        post_delete.connect(clear_comic_caches_on_commit, sender=Comic, dispatch_uid="clear_comic_caches_on_delete")
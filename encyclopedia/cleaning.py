@@ -0,0 +1,46 @@
+# encyclopedia/cleaning.py
+import re
+
+# Replace common special characters with readable text
+SPECIAL_CHAR_REPLACEMENTS = {
+    '&': ' and ',
+    '@': ' at ',
+    '#': ' number ',
+    '%': ' percent ',
+    '$': ' dollar ',
+    '©': ' copyright ',
+    '®': ' registered ',
+    '™': ' trademark ',
+}
+
+# All keys are single characters, so one str.translate call replaces them all
+_TRANS = str.maketrans(SPECIAL_CHAR_REPLACEMENTS)
+# Anything except word characters, whitespace and basic punctuation
+_SPECIAL_RE = re.compile(r'[^\w\s\-\.\,\!\?\:\;\(\)]')
+_WS_RE = re.compile(r'\s+')
+
+def clean_special_characters(text: str) -> str:
+    """
+    Clean special characters from text while preserving readability.
+    SOLID: Single Responsibility - only handles character cleaning.
+    """
+    if not text:
+        return text
+    text = text.translate(_TRANS)
+    # Remove remaining problematic characters, then collapse repeated whitespace
+    return _WS_RE.sub(' ', _SPECIAL_RE.sub(' ', text)).strip()
+
+def clean_special_characters_frame(df):
+    """
+    Column-wise version of clean_special_characters for a pandas DataFrame of strings.
+    Each pass runs once per column instead of once per cell.
+    """
+    df = df.copy()
+    for col in df.columns:
+        df[col] = (
+            df[col].str.translate(_TRANS)
+            .str.replace(_SPECIAL_RE, ' ', regex=True)
+            .str.replace(_WS_RE, ' ', regex=True)
+            .str.strip()
+        )
+    return df
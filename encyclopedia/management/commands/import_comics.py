@@ -1,11 +1,36 @@
 # encyclopedia/management/commands/import_comics.py
-import csv
+import codecs
+import io
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from pathlib import Path
-from encyclopedia.parsers import parse_row_to_record
+from encyclopedia.parsers import build_column_index, parse_chunk_frame
+from encyclopedia.models import Comic
 from encyclopedia.repositories import ComicRepository
-import chardet
+from encyclopedia.services import clear_comic_caches
+from encyclopedia.cleaning import clean_special_characters
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+import csv
+import heapq
+import multiprocessing
 import re
+import warnings
+import pandas as pd
+
+# pyarrow's multithreaded C++ CSV parser is optional; pandas' chunked reader is the fallback
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+except ImportError:
+    pa = None
+
+# Prefer the C implementation of chardet; charset_normalizer offers the same detect() API
+try:
+    import cchardet as _det
+except ImportError:
+    import charset_normalizer as _det
 
 CSV_FILES = [
     "names.csv",   # you provided these files. adjust paths if needed.
@@ -13,6 +38,181 @@ CSV_FILES = [
     "records.csv"
 ]
 
+# Bytes read from the start of each file for encoding detection
+DETECT_SAMPLE_SIZE = 65536
+
+# Read buffer for CSV files; large reads amortize syscalls on slow disks/NFS
+READ_BUFFER_SIZE = 1 << 20
+
+# Default number of CSV rows parsed and written per bulk upsert
+BATCH_SIZE = 2000
+
+# pandas reports each malformed row it skips as "Skipping line N: ..." in a ParserWarning
+_SKIPPED_LINE = re.compile(r"Skipping line (\d+)")
+
+def _is_utf8(sample):
+    """True if sample decodes as UTF-8; a multi-byte character cut off at the end is allowed."""
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+def detect_encoding(fh, sample_size=DETECT_SAMPLE_SIZE):
+    """
+    Guesses the encoding of a binary file handle from its next sample_size bytes.
+    Returns (encoding, confidence); ASCII and valid UTF-8 samples skip detection entirely.
+    The handle is left wherever detection stopped reading; callers seek back.
+    """
+    sample = fh.read(sample_size)
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig", 1.0
+    if sample.isascii() or _is_utf8(sample):
+        return "utf-8", 1.0
+
+    detected = _det.detect(sample)
+    enc = detected["encoding"]
+    confidence = detected.get("confidence") or 0
+
+    # Low confidence: keep feeding the incremental detector until it is sure
+    if confidence < 0.5 and hasattr(_det, "UniversalDetector"):
+        detector = _det.UniversalDetector()
+        detector.feed(sample)
+        while not detector.done:
+            block = fh.read(sample_size)
+            if not block:
+                break
+            detector.feed(block)
+        detector.close()
+        if detector.result.get("encoding"):
+            enc = detector.result["encoding"]
+            confidence = detector.result.get("confidence") or 0
+
+    enc = enc or "utf-8"
+    try:
+        codecs.lookup(enc)
+    except LookupError:
+        # Detectors can name charsets Python has no codec for (e.g. VISCII)
+        return "cp1252", 0
+    return enc, confidence
+
+def _imap_bounded(executor, fn, jobs, window):
+    """
+    Like executor.map, but keeps at most `window` jobs in flight so a large
+    file is never queued into memory all at once. Results keep job order.
+    """
+    pending = deque()
+    for job in jobs:
+        pending.append(executor.submit(fn, *job))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _read_frames_pyarrow(raw, enc, batch_size, bad_lines):
+    """
+    Streams the file through pyarrow's multithreaded block reader and yields string
+    DataFrames of up to batch_size rows, holding one block in memory at a time.
+    Raises pa.ArrowInvalid if the header or first block cannot be parsed, before
+    anything has been yielded.
+    Like the pandas reader, rows with more fields than the header are skipped and
+    recorded in bad_lines, and short rows are kept with blank fields. pyarrow numbers
+    records rather than lines, so the two only differ after a value spanning lines.
+    """
+    read_options = pacsv.ReadOptions(block_size=READ_BUFFER_SIZE, use_threads=True, encoding=enc)
+
+    def parse_options(handler):
+        # Blank lines come through the handler too, so every record of the file is numbered
+        return pacsv.ParseOptions(newlines_in_values=True, ignore_empty_lines=False, invalid_row_handler=handler)
+
+    # pyarrow parses the header itself; type inference would turn ids like 000932785
+    # into ints, so the names are read first and the file is reopened all-string
+    names = pacsv.open_csv(raw, read_options=read_options, parse_options=parse_options(lambda row: "skip")).schema.names
+    raw.seek(0)
+
+    # pyarrow can only skip invalid rows. They are queued by record number (the header
+    # is record 1), and short rows are padded and put back where they were read
+    invalid = []
+
+    def invalid_row(row):
+        short = row.actual_columns < row.expected_columns
+        if not short:
+            bad_lines.append(row.number)
+        heapq.heappush(invalid, (row.number, row.text if short else None))
+        return "skip"
+
+    reader = pacsv.open_csv(
+        raw,
+        read_options=read_options,
+        parse_options=parse_options(invalid_row),
+        convert_options=pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in names},
+            strings_can_be_null=False,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+
+    def padded(text):
+        return (next(csv.reader([text]), []) + [""] * len(names))[:len(names)]
+
+    def with_short_rows(df, number):
+        """
+        Inserts the short rows read among df's rows, the first of which is record number.
+        Returns the frame and the number of the record after it. Invalid rows of the
+        next block, which pyarrow parses ahead, stay queued.
+        """
+        pieces, taken, skipped = [], 0, 0
+        while invalid and invalid[0][0] <= number + len(df) + skipped:
+            invalid_number, text = heapq.heappop(invalid)
+            before = invalid_number - number - skipped  # rows of df read before it
+            if text is not None:
+                pieces += [df.iloc[taken:before], pd.DataFrame([padded(text)], columns=names)]
+                taken = before
+            skipped += 1
+        next_number = number + len(df) + skipped
+        if not pieces:
+            return df, next_number
+        return pd.concat(pieces + [df.iloc[taken:]], ignore_index=True), next_number
+
+    def frames():
+        offset = 0
+        number = 2  # the first record after the header
+        for record_batch in reader:
+            df, number = with_short_rows(record_batch.to_pandas(), number)
+            # Rows only become Python objects one batch at a time
+            for start in range(0, len(df), batch_size):
+                chunk = df.iloc[start:start + batch_size]
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                offset += len(chunk)
+                yield chunk
+        # Short rows after the last full row
+        tail = [padded(text) for _, text in sorted(invalid) if text is not None]
+        if tail:
+            yield pd.DataFrame(tail, columns=names, index=pd.RangeIndex(offset, offset + len(tail)))
+    return frames()
+
+def _read_frames_pandas(fh, batch_size, bad_lines):
+    """
+    Streams string DataFrames of up to batch_size rows with pandas' chunked C reader.
+    Malformed rows are skipped and their line numbers recorded in bad_lines.
+    pandas does not flag a malformed row that opens a chunk after the first: it keeps
+    the row, cut to the header's columns.
+    """
+    chunks = pd.read_csv(fh, dtype=str, keep_default_na=False, on_bad_lines="warn", chunksize=batch_size)
+    while True:
+        # Each chunk read warns once, listing the lines it skipped
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", pd.errors.ParserWarning)
+            chunk = next(chunks, None)
+        for warning in caught:
+            if issubclass(warning.category, pd.errors.ParserWarning):
+                bad_lines.extend(int(n) for n in _SKIPPED_LINE.findall(str(warning.message)))
+            else:
+                warnings.warn_explicit(warning.message, warning.category, warning.filename, warning.lineno)
+        if chunk is None:
+            return
+        yield chunk
+
 class Command(BaseCommand):
     help = "Import comics from CSV files into the Comic model with proper special character handling"
 
@@ -27,110 +227,187 @@ class Command(BaseCommand):
             action='store_true',
             help='Show detailed import progress',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Number of rows parsed and written per batch (default: {BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Worker processes used to parse and clean rows; 1 parses in-process (default: 1)',
+        )
+        parser.add_argument(
+            '--engine',
+            choices=['auto', 'pyarrow', 'pandas'],
+            default='auto',
+            help='CSV reader: pyarrow (multithreaded blocks) or pandas (single-threaded chunks); '
+                 'auto uses pyarrow when installed',
+        )
 
     def clean_special_characters(self, text):
         """
         Clean special characters from text while preserving readability.
-        SOLID: Single Responsibility - only handles character cleaning.
+        SOLID: Single Responsibility - delegates to the shared cleaning helper.
         """
-        if not text:
-            return text
-            
-        # Replace common problematic characters with readable alternatives
-        replacements = {
-            '&': ' and ',
-            '@': ' at ',
-            '#': ' number ',
-            '%': ' percent ',
-            '$': ' dollar ',
-            '©': ' copyright ',
-            '®': ' registered ',
-            '™': ' trademark ',
-        }
-        
-        for char, replacement in replacements.items():
-            text = text.replace(char, replacement)
-        
-        # Remove other problematic characters but keep basic punctuation
-        text = re.sub(r'[^\w\s\-\.\,\!\?\:\;\(\)]', ' ', text)
-        # Clean up multiple spaces
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
+        return clean_special_characters(text)
+
+    def read_frames(self, raw, enc, batch_size, engine="auto", bad_lines=None):
+        """
+        Yields DataFrame chunks of string columns read from a binary file handle.
+        Malformed rows are skipped; if bad_lines is given, one entry per skipped row
+        (its line number, when the reader knows it) is appended to it.
+        SOLID: Single Responsibility - only chooses and drives the CSV reader.
+        """
+        bad_lines = [] if bad_lines is None else bad_lines
+        if engine != "pandas" and pa is not None:
+            try:
+                return _read_frames_pyarrow(raw, enc, batch_size, bad_lines)
+            except (pa.ArrowInvalid, UnicodeDecodeError) as e:
+                self.stdout.write(self.style.WARNING(f"  - pyarrow could not parse file, using pandas: {e}"))
+                bad_lines.clear()  # pandas reads the file again from the start
+                raw.seek(0)
+        elif engine == "pyarrow":
+            self.stdout.write(self.style.WARNING("  - pyarrow is not installed, using pandas"))
+
+        fh = io.TextIOWrapper(raw, encoding=enc, errors="replace", newline="")
+        return _read_frames_pandas(fh, batch_size, bad_lines)
+
+    def flush_batch(self, batch, verbose=False, batch_size=BATCH_SIZE, use_copy=False):
+        """
+        Writes a batch of parsed records and returns (imported, failed) row counts.
+        If the bulk write fails, the batch is retried row by row so only bad rows are lost.
+        SOLID: Single Responsibility - only hands the batch to the repository.
+        """
+        try:
+            ComicRepository.bulk_upsert(batch, batch_size=batch_size, use_copy=use_copy)
+            return len(batch), 0
+        except Exception as e:
+            if verbose:
+                self.stdout.write(
+                    self.style.WARNING(f"    Error writing batch of {len(batch)} rows, retrying row by row: {str(e)}")
+                )
+        imported = failed = 0
+        for parsed in batch:
+            try:
+                # Savepoint per row: a failed row leaves the file's transaction usable
+                with transaction.atomic():
+                    ComicRepository.upsert_from_parsed(parsed)
+                imported += 1
+            except Exception as e:
+                failed += 1
+                if verbose:
+                    self.stdout.write(
+                        self.style.WARNING(f"    Error on record {parsed.bl_record_id}: {str(e)}")
+                    )
+        return imported, failed
 
     def handle(self, *args, **options):
         clean_chars = options['clean_special_chars']
         verbose = options['verbose']
+        batch_size = max(1, options['batch_size'])
+        workers = max(1, options['workers'])
+        engine = options['engine']
         
         total_imported = 0
         total_errors = 0
         
         self.stdout.write(self.style.SUCCESS("Starting comic import process..."))
         
+        # Parsing/cleaning is CPU-bound, so with --workers > 1 it runs in a process pool,
+        # while database writes stay in this process to avoid connection fan-out.
+        # The pool only starts once a file has more than one chunk, and its workers are
+        # spawned rather than forked so they never inherit the open database connection.
+        pool = None
+        
+        # Initial load into an empty table: new rows can be COPY-loaded (PostgreSQL only)
+        use_copy = not Comic.objects.exists()
+        
         base = Path.cwd()
-        for fname in CSV_FILES:
-            path = base / fname
-            if not path.exists():
-                self.stdout.write(self.style.WARNING(f"File not found: {path}"))
-                continue
-
-            # Detect encoding to handle MARC8->UTF-8 issues
-            raw = path.read_bytes()
-            detected = chardet.detect(raw)
-            enc = detected["encoding"] or "utf-8"
-            confidence = detected.get("confidence", 0)
-            
-            self.stdout.write(f"Processing {fname}:")
-            self.stdout.write(f"  - Detected encoding: {enc} (confidence: {confidence:.2f})")
-            
-            try:
-                with path.open("r", encoding=enc, errors="replace") as fh:
-                    reader = csv.DictReader(fh)
-                    count = 0
-                    errors = 0
-                    
-                    for row_num, row in enumerate(reader, 1):
-                        try:
-                            # Clean special characters if requested
-                            if clean_chars:
-                                cleaned_row = {}
-                                for key, value in row.items():
-                                    if isinstance(value, str):
-                                        cleaned_row[key] = self.clean_special_characters(value)
-                                    else:
-                                        cleaned_row[key] = value
-                                row = cleaned_row
-                            
-                            parsed = parse_row_to_record(row)
-                            if parsed.get("bl_record_id"):
-                                ComicRepository.upsert_from_parsed(parsed)
-                                count += 1
-                                
-                                if verbose and count % 100 == 0:
-                                    self.stdout.write(f"    Processed {count} records...")
-                                    
-                        except Exception as e:
-                            errors += 1
+        try:
+            for fname in CSV_FILES:
+                path = base / fname
+                if not path.exists():
+                    self.stdout.write(self.style.WARNING(f"File not found: {path}"))
+                    continue
+
+                self.stdout.write(f"Processing {fname}:")
+                
+                try:
+                    # Read each file through one buffered handle: sample, rewind, then parse.
+                    # The file is one transaction; each batch's atomic block in bulk_upsert
+                    # becomes a savepoint, so a failed batch is rolled back on its own.
+                    with path.open("rb", buffering=READ_BUFFER_SIZE) as raw, transaction.atomic():
+                        # Detect encoding to handle MARC8->UTF-8 issues
+                        enc, confidence = detect_encoding(raw)
+                        raw.seek(0)
+                        self.stdout.write(f"  - Detected encoding: {enc} (confidence: {confidence:.2f})")
+                        
+                        bad_lines = []
+                        reader = self.read_frames(raw, enc, batch_size, engine, bad_lines)
+                        count = 0
+                        errors = 0
+                        
+                        # Headers are fixed per file: resolve column positions once
+                        chunks = iter(reader)
+                        head = [chunk for chunk in (next(chunks, None), next(chunks, None)) if chunk is not None]
+                        idx = build_column_index(head[0].columns) if head else {}
+                        jobs = ((chunk, idx, clean_chars) for chunk in chain(head, chunks))
+                        if pool is None and workers > 1 and len(head) > 1:
+                            pool = ProcessPoolExecutor(
+                                max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                            )
+                        if pool is not None:
+                            results = _imap_bounded(pool, parse_chunk_frame, jobs, workers * 2)
+                        else:
+                            results = (parse_chunk_frame(*job) for job in jobs)
+                        
+                        for parsed, row_errors in results:
+                            errors += len(row_errors)
                             if verbose:
-                                self.stdout.write(
-                                    self.style.WARNING(f"    Error on row {row_num}: {str(e)}")
-                                )
-                    
-                    total_imported += count
-                    total_errors += errors
-                    
-                    self.stdout.write(
-                        self.style.SUCCESS(f"  - Imported {count} records from {fname}")
-                    )
-                    if errors > 0:
+                                for row_num, message in row_errors:
+                                    self.stdout.write(
+                                        self.style.WARNING(f"    Error on row {row_num}: {message}")
+                                    )
+                            if parsed:
+                                flushed, failed = self.flush_batch(parsed, verbose, batch_size, use_copy)
+                                count += flushed
+                                errors += failed
+                            if verbose:
+                                self.stdout.write(f"    Processed {count} records...")
+                        
+                        # Rows the CSV reader could not split into the header's columns
+                        errors += len(bad_lines)
+                        if verbose:
+                            for line in bad_lines:
+                                where = f" at line {line}" if line is not None else ""
+                                self.stdout.write(self.style.WARNING(f"    Skipped malformed row{where}"))
+                        
+                        total_imported += count
+                        total_errors += errors
+                        
                         self.stdout.write(
-                            self.style.WARNING(f"  - {errors} errors encountered")
+                            self.style.SUCCESS(f"  - Imported {count} records from {fname}")
                         )
-                        
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f"Failed to process {fname}: {str(e)}")
-                )
-                continue
+                        if errors > 0:
+                            self.stdout.write(
+                                self.style.WARNING(f"  - {errors} errors encountered")
+                            )
+                            
+                except Exception as e:
+                    self.stdout.write(
+                        self.style.ERROR(f"Failed to process {fname}: {str(e)}")
+                    )
+                    continue
+        finally:
+            # Also reached on errors escaping the loop (e.g. KeyboardInterrupt): no worker is left behind
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        
+        # Bulk writes send no signals; with a shared cache backend this also reaches the web workers
+        clear_comic_caches()
         
         # Final summary
         self.stdout.write(self.style.SUCCESS("\n" + "="*50))
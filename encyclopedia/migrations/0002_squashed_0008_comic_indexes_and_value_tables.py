@@ -0,0 +1,194 @@
+# Generated by Django 4.2 on 2026-10-14 18:10
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+# JSON list field -> many-to-many field, as in models.VALUE_FIELDS
+VALUE_FIELDS = {
+    'authors': 'author_values',
+    'genres': 'genre_values',
+    'publication_years': 'year_values',
+    'languages': 'language_values',
+}
+BATCH_SIZE = 2000
+
+# JSON containment index for get_comics_with_missing_isbn (isbn @> '["missing"]').
+# GIN is PostgreSQL-only, so other backends skip it.
+GIN_INDEXES = {
+    'comic_isbn_gin': 'isbn',
+}
+# Trigram indexes for the search filters' __icontains lookups. On PostgreSQL
+# Django renders those as UPPER(col::text) LIKE UPPER('%value%'), so each index
+# is built on exactly that expression; substring semantics stay unchanged.
+# Index name -> indexed expression: Comic columns for the title filter, one
+# other_fields key each for the edition and name type filters.
+COMIC_TRIGRAM_INDEXES = {
+    'comic_title_trgm': '"title"',
+    'comic_variant_titles_trgm': '"variant_titles"',
+    'comic_editions_trgm': "(\"other_fields\" ->> 'editions')",
+    'comic_name_type_trgm': "(\"other_fields\" ->> 'name_type')",
+}
+# The author, genre, year and language filters match through the value tables,
+# so those are indexed on their name columns (<model>_name_trgm)
+VALUE_TRIGRAM_MODELS = ['author', 'genre', 'publicationyear', 'language']
+
+
+def populate_value_tables(apps, schema_editor):
+    Comic = apps.get_model('encyclopedia', 'Comic')
+    pks = list(Comic.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(pks), BATCH_SIZE):
+        rows = list(Comic.objects.filter(pk__in=pks[start:start + BATCH_SIZE]).values_list('pk', *VALUE_FIELDS))
+        for i, m2m_name in enumerate(VALUE_FIELDS.values(), start=1):
+            m2m = Comic._meta.get_field(m2m_name)
+            model, through = m2m.related_model, m2m.remote_field.through
+            src, dst = m2m.m2m_field_name(), m2m.m2m_reverse_field_name()
+            links = {(row[0], str(value)) for row in rows for value in row[i] if value}
+            names = list({name for _, name in links})
+            model.objects.bulk_create([model(name=name) for name in names], ignore_conflicts=True)
+            value_ids = {name: obj.pk for name, obj in model.objects.in_bulk(names, field_name='name').items()}
+            through.objects.bulk_create(
+                [through(**{f'{src}_id': pk, f'{dst}_id': value_ids[name]}) for pk, name in links],
+                batch_size=BATCH_SIZE, ignore_conflicts=True,
+            )
+
+
+def _has_pg_trgm(schema_editor):
+    """
+    Installs pg_trgm when the server ships it. Servers without the contrib
+    extensions skip the trigram indexes; the filters then fall back to seq scans.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return False
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    return True
+
+
+def create_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = schema_editor.quote_name(apps.get_model('encyclopedia', 'Comic')._meta.db_table)
+    for name, column in GIN_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} jsonb_path_ops)'
+        )
+    if not _has_pg_trgm(schema_editor):
+        return
+    for name, expression in COMIC_TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+            f'USING gin ((UPPER({expression}::text)) gin_trgm_ops)'
+        )
+    for model_name in VALUE_TRIGRAM_MODELS:
+        value_table = schema_editor.quote_name(apps.get_model('encyclopedia', model_name)._meta.db_table)
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {model_name}_name_trgm ON {value_table} '
+            f'USING gin ((UPPER("name"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    names = [*GIN_INDEXES, *COMIC_TRIGRAM_INDEXES, *(f'{m}_name_trgm' for m in VALUE_TRIGRAM_MODELS)]
+    for name in names:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    replaces = [
+        ('encyclopedia', '0002_comic_indexes'),
+        ('encyclopedia', '0003_searchlog_indexes'),
+        ('encyclopedia', '0004_comic_title_lower_index'),
+        ('encyclopedia', '0005_comic_trigram_indexes'),
+        ('encyclopedia', '0006_comic_value_tables'),
+        ('encyclopedia', '0007_other_fields_key_trigram_indexes'),
+        ('encyclopedia', '0008_drop_genres_gin_index'),
+    ]
+
+    dependencies = [
+        ('encyclopedia', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comic',
+            index=models.Index(fields=['title'], name='comic_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comic',
+            index=models.Index(django.db.models.functions.text.Lower('title'), name='comic_title_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchlog',
+            index=models.Index(fields=['query_text'], name='searchlog_query_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchlog',
+            index=models.Index(fields=['timestamp'], name='searchlog_timestamp_idx'),
+        ),
+        migrations.CreateModel(
+            name='Author',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.TextField(unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.TextField(unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Language',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.TextField(unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PublicationYear',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.TextField(unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='comic',
+            name='author_values',
+            field=models.ManyToManyField(blank=True, related_name='comics', to='encyclopedia.author'),
+        ),
+        migrations.AddField(
+            model_name='comic',
+            name='genre_values',
+            field=models.ManyToManyField(blank=True, related_name='comics', to='encyclopedia.genre'),
+        ),
+        migrations.AddField(
+            model_name='comic',
+            name='language_values',
+            field=models.ManyToManyField(blank=True, related_name='comics', to='encyclopedia.language'),
+        ),
+        migrations.AddField(
+            model_name='comic',
+            name='year_values',
+            field=models.ManyToManyField(blank=True, related_name='comics', to='encyclopedia.publicationyear'),
+        ),
+        migrations.RunPython(populate_value_tables, migrations.RunPython.noop),
+        migrations.RunPython(create_postgres_indexes, drop_postgres_indexes),
+    ]
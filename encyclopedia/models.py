@@ -1,6 +1,36 @@
 # encyclopedia/models.py
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, connections, models, router, transaction
+from django.db.models.functions import Lower
 from django.utils import timezone
+from .cleaning import clean_special_characters
+
+class FieldValue(models.Model):
+    """
+    One distinct value of a multi-value Comic field, e.g. a single author name.
+    
+    SOLID SRP: Single Responsibility - only stores a value, so filters can match
+    individual values through an index instead of scanning every comic's JSON text
+    """
+    name = models.TextField(unique=True)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return self.name
+
+class Author(FieldValue):
+    pass
+
+class Genre(FieldValue):
+    pass
+
+class PublicationYear(FieldValue):
+    pass
+
+class Language(FieldValue):
+    pass
+
 
 class Comic(models.Model):
     """
@@ -21,6 +51,21 @@ class Comic(models.Model):
     isbn = models.JSONField(default=list)  # list or ["missing"]
     other_fields = models.JSONField(default=dict)  # any other cleaned fields
     created_at = models.DateTimeField(default=timezone.now)
+    # Normalized copies of the list fields above (see VALUE_FIELDS), used by the
+    # search filters; kept in sync by save() and sync_value_tables()
+    author_values = models.ManyToManyField(Author, related_name="comics", blank=True)
+    genre_values = models.ManyToManyField(Genre, related_name="comics", blank=True)
+    year_values = models.ManyToManyField(PublicationYear, related_name="comics", blank=True)
+    language_values = models.ManyToManyField(Language, related_name="comics", blank=True)
+
+    class Meta:
+        # bl_record_id is already covered by its unique index. JSON containment
+        # (GIN) indexes are PostgreSQL-only and created in migration 0002.
+        indexes = [
+            models.Index(fields=["title"], name="comic_title_idx"),
+            # Case-insensitive title ordering for search results
+            models.Index(Lower("title"), name="comic_title_lower_idx"),
+        ]
 
     def __str__(self):
         """
@@ -28,6 +73,22 @@ class Comic(models.Model):
         """
         return f"{self.title} ({self.bl_record_id})"
 
+    def save(self, *args, sync_values=True, **kwargs):
+        """
+        Saves the row and rebuilds its value table links in one transaction.
+        Pass sync_values=False when saving many comics, then call sync_value_tables()
+        once for all of them: each sync costs a dozen or so queries.
+        """
+        if not sync_values:
+            return super().save(*args, **kwargs)
+        # Same alias Model.save() picks; the row and its value links commit together
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None or not VALUE_FIELDS.keys().isdisjoint(update_fields):
+                sync_value_tables([self.bl_record_id], using=using)
+
     def get_isbn(self):
         """
         Returns ISBN or 'missing' if not present.
@@ -53,12 +114,14 @@ class Comic(models.Model):
         """
         multi_fields = {}
         for key, value in self.other_fields.items():
-            if isinstance(value, str) and ";" in value:
-                # Split by semicolon and clean each value
-                values = [v.strip() for v in value.split(";") if v.strip()]
-                multi_fields[key] = values
-            elif isinstance(value, list):
+            if isinstance(value, list):
                 multi_fields[key] = value
+            elif isinstance(value, str):
+                if value.find(";") != -1:
+                    # Split by semicolon and clean each value, stripping each part once
+                    multi_fields[key] = [p for p in (v.strip() for v in value.split(";")) if p]
+                elif value:  # Single value, no split or strip needed
+                    multi_fields[key] = [value]
             elif value:  # Single value, non-empty
                 multi_fields[key] = [str(value)]
         return multi_fields
@@ -89,28 +152,8 @@ class Comic(models.Model):
         SOLID OCP: Open/Closed - we can extend this with new character replacements
         without modifying existing cleaning logic
         """
-        import re
         # Handle special characters properly - replace with appropriate text
-        title = self.title or ""
-        # Replace common special characters with readable text
-        replacements = {
-            '&': ' and ',
-            '@': ' at ',
-            '#': ' number ',
-            '%': ' percent ',
-            '$': ' dollar ',
-            '©': ' copyright ',
-            '®': ' registered ',
-            '™': ' trademark ',
-        }
-        for char, replacement in replacements.items():
-            title = title.replace(char, replacement)
-        
-        # Remove remaining problematic characters but keep basic punctuation
-        title = re.sub(r'[^\w\s\-\.\,\!\?\:\;\(\)]', ' ', title)
-        # Clean up multiple spaces
-        title = re.sub(r'\s+', ' ', title).strip()
-        return title
+        return clean_special_characters(self.title or "")
 
     def aggregate_variants(self):
         """
@@ -133,6 +176,67 @@ class Comic(models.Model):
         }
 
 
+# JSON list field -> many-to-many field holding its values one row each
+VALUE_FIELDS = {
+    "authors": "author_values",
+    "genres": "genre_values",
+    "publication_years": "year_values",
+    "languages": "language_values",
+}
+# Most values bound into one IN (...) list or multi-row INSERT. SQLite caps the
+# variables of a statement (999 before 3.32), so longer lists are split.
+SQL_BATCH_SIZE = 500
+
+def _batches(items):
+    items = list(items)
+    for start in range(0, len(items), SQL_BATCH_SIZE):
+        yield items[start:start + SQL_BATCH_SIZE]
+
+def sync_value_tables(bl_record_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Rebuilds the value tables and links of the given comics from their JSON list fields,
+    on database alias using. Links are deleted and re-inserted in one transaction,
+    so a failure never leaves a comic without them.
+    Runs a fixed number of queries per SQL_BATCH_SIZE comics or values, however many
+    comics are passed.
+    """
+    with transaction.atomic(using=using):
+        for batch in _batches(bl_record_ids):
+            _sync_value_links(batch, using)
+
+def _sync_value_links(bl_record_ids, using):
+    connection = connections[using]
+    rows = list(Comic.objects.using(using).filter(bl_record_id__in=bl_record_ids).values_list("pk", *VALUE_FIELDS))
+    pks = [row[0] for row in rows]
+    qn = connection.ops.quote_name
+    for i, m2m_name in enumerate(VALUE_FIELDS.values(), start=1):
+        m2m = Comic._meta.get_field(m2m_name)
+        model, through = m2m.related_model, m2m.remote_field.through
+        src, dst = m2m.m2m_field_name(), m2m.m2m_reverse_field_name()
+        links = {(row[0], str(value)) for row in rows for value in row[i] if value}
+        names = {name for _, name in links}
+        value_ids = {}
+        for batch in _batches(names):
+            value_ids.update(model.objects.using(using).filter(name__in=batch).values_list("name", "pk"))
+        missing = names.difference(value_ids)
+        if missing:
+            model.objects.using(using).bulk_create(
+                [model(name=name) for name in missing], batch_size=SQL_BATCH_SIZE, ignore_conflicts=True,
+            )
+            for batch in _batches(missing):
+                value_ids.update(model.objects.using(using).filter(name__in=batch).values_list("name", "pk"))
+        through.objects.using(using).filter(**{f"{src}__in": pks}).delete()
+        # Links are plain id pairs; raw executemany skips building a model instance per row
+        sql = "INSERT INTO %s (%s, %s) VALUES (%%s, %%s)" % (
+            qn(through._meta.db_table),
+            qn(through._meta.get_field(src).column),
+            qn(through._meta.get_field(dst).column),
+        )
+        if links:
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, [(pk, value_ids[name]) for pk, name in links])
+
+
 class SearchLog(models.Model):
     """
     SOLID SRP: Single Responsibility - this model ONLY handles search logging data
@@ -145,3 +249,10 @@ class SearchLog(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     result_ids = models.JSONField(default=list)  # list of bl_record_id strings
     num_results = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            # top_queries groups by query_text; timestamp serves time-ordered log scans
+            models.Index(fields=["query_text"], name="searchlog_query_idx"),
+            models.Index(fields=["timestamp"], name="searchlog_timestamp_idx"),
+        ]
@@ -0,0 +1,26 @@
+# encyclopedia/pagination.py
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator that keeps its object count in Django's cache under cache_key,
+    so page loads skip the COUNT(*) over the whole table.
+    Whoever changes the underlying rows deletes cache_key; the timeout bounds any miss.
+
+    SOLID OCP: Open/Closed - extends Paginator without changing how pages are sliced
+    """
+    def __init__(self, object_list, per_page, cache_key, timeout=300, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+        self.timeout = timeout
+
+    @cached_property
+    def count(self):
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = super().count
+            cache.set(self.cache_key, count, self.timeout)
+        return count
@@ -1,24 +1,47 @@
 # encyclopedia/parsers.py
-import csv
-import codecs
-from typing import List, Dict
+import re
+from dataclasses import dataclass, field
+from typing import List, Dict, Iterable, Optional, Sequence
+from .cleaning import clean_special_characters_frame
+
+# Columns mapped onto Comic fields, and extra columns kept in other_fields
+RECORD_COLUMNS = ["BL record ID", "Title", "Variant titles", "Name", "Date of publication", "Genre", "Languages", "ISBN"]
+OTHER_COLUMNS = ["Publisher", "Place of publication", "Topics", "Physical description", "Notes", "Edition", "Type of name"]
+# other_fields keys that differ from the normalized column name; the edition and
+# name type search filters look these keys up
+OTHER_FIELD_KEYS = {"Edition": "editions", "Type of name": "name_type"}
+_SEMI_RE = re.compile(r"\s*;\s*")
+_COMMA_RE = re.compile(r"\s*,\s*")
+# (column, other_fields key) pairs, normalized once instead of on every row
+_OTHER_KEYS = [(name, OTHER_FIELD_KEYS.get(name) or name.lower().replace(" ", "_")) for name in OTHER_COLUMNS]
+
+@dataclass(slots=True)
+class ParsedRecord:
+    """
+    One parsed CSV row. Slotted, so each row is a fixed-size object rather than a dict.
+    Turned into a Comic only when the repository writes the batch.
+    """
+    bl_record_id: str
+    title: str = ""
+    variant_titles: List[str] = field(default_factory=list)
+    authors: List[str] = field(default_factory=list)
+    publication_years: List[str] = field(default_factory=list)
+    genres: List[str] = field(default_factory=list)
+    languages: List[str] = field(default_factory=list)
+    isbn: List[str] = field(default_factory=lambda: ["missing"])
+    other_fields: Dict = field(default_factory=dict)
 
 def split_semicolon_field(value: str) -> List[str]:
-    if not value or value.strip() == "":
+    if not value:
         return []
-    # split on semicolon and strip whitespace; handle weird unicode separators
-    parts = [p.strip() for p in value.split(";") if p.strip() != ""]
-    return parts
+    # split on semicolon and strip whitespace (unicode-aware \s) in one regex pass
+    return [p for p in _SEMI_RE.split(value.strip()) if p]
 
 def parse_isbn(value: str) -> List[str]:
-    parts = []
-    if not value or value.strip() == "":
+    if not value:
         return ["missing"]
-    # some are comma-separated
-    for p in value.replace(" ", "").split(","):
-        p = p.strip()
-        if p:
-            parts.append(p)
+    # some are comma-separated; spaces inside an ISBN are dropped, not treated as separators
+    parts = [p for p in _COMMA_RE.split(value.replace(" ", "").strip()) if p]
     return parts or ["missing"]
 
 def normalize_text(value: str) -> str:
@@ -27,22 +50,58 @@ def normalize_text(value: str) -> str:
     # Ensure unicode and remove weird control characters
     return str(value).strip()
 
-def parse_row_to_record(row: Dict[str, str]) -> Dict:
-    # Assumes CSV header keys match dataset (Title, Variant titles, Genre, ISBN etc.)
-    rec = {}
-    rec["bl_record_id"] = normalize_text(row.get("BL record ID") or row.get("BL record id") or row.get("BL record id"))
-    rec["title"] = normalize_text(row.get("Title") or row.get("Title "))
-    rec["variant_titles"] = split_semicolon_field(row.get("Variant titles") or row.get("Variant titles "))
-    rec["authors"] = split_semicolon_field(row.get("Name") or row.get("Name "))
-    rec["publication_years"] = split_semicolon_field(row.get("Date of publication") or row.get("Date of publication "))
-    rec["genres"] = split_semicolon_field(row.get("Genre") or row.get("Genre "))
-    rec["languages"] = split_semicolon_field(row.get("Languages") or row.get("Languages "))
-    rec["isbn"] = parse_isbn(row.get("ISBN") or row.get("ISBN "))
+def build_column_index(headers: Iterable[str]) -> Dict[str, int]:
+    """
+    Maps the canonical column names to their positions in a CSV header row.
+    Header names are stripped and matched case-insensitively, once per file.
+    """
+    positions = {}
+    for i, header in enumerate(headers):
+        positions.setdefault(str(header).strip().lower(), i)
+    return {name: positions[name.lower()] for name in RECORD_COLUMNS + OTHER_COLUMNS if name.lower() in positions}
+
+def _cell(row: Sequence[str], idx: Dict[str, int], name: str) -> Optional[str]:
+    i = idx.get(name)
+    return row[i] if i is not None else None
+
+def parse_row_to_record(row: Sequence[str], idx: Dict[str, int]) -> ParsedRecord:
+    # row is a positional CSV row; idx comes from build_column_index on the file's header
     # other fields: keep as dict; also split multi-value fields into lists
     other = {}
-    for key in ["Publisher", "Place of publication", "Topics", "Physical description", "Notes"]:
-        if key in row:
-            val = row.get(key)
-            other[key.lower().replace(" ", "_")] = split_semicolon_field(val) if val and ";" in (val or "") else normalize_text(val)
-    rec["other_fields"] = other
-    return rec
+    for key, norm in _OTHER_KEYS:
+        i = idx.get(key)
+        if i is None:
+            continue
+        val = row[i]
+        other[norm] = split_semicolon_field(val) if val and ";" in val else normalize_text(val)
+    return ParsedRecord(
+        bl_record_id=normalize_text(_cell(row, idx, "BL record ID")),
+        title=normalize_text(_cell(row, idx, "Title")),
+        variant_titles=split_semicolon_field(_cell(row, idx, "Variant titles")),
+        authors=split_semicolon_field(_cell(row, idx, "Name")),
+        publication_years=split_semicolon_field(_cell(row, idx, "Date of publication")),
+        genres=split_semicolon_field(_cell(row, idx, "Genre")),
+        languages=split_semicolon_field(_cell(row, idx, "Languages")),
+        isbn=parse_isbn(_cell(row, idx, "ISBN")),
+        other_fields=other,
+    )
+
+def parse_chunk_frame(chunk, idx: Dict[str, int], clean_chars: bool = False):
+    """
+    Parses a pandas DataFrame chunk of CSV rows into records.
+    Returns (records, errors) where errors is a list of (row_num, message).
+    Does not touch the database, so it can run in a worker process.
+    """
+    chunk = chunk.fillna("")  # short rows leave NaN even with keep_default_na=False
+    if clean_chars:
+        chunk = clean_special_characters_frame(chunk)
+    records = []
+    errors = []
+    for row_num, row in zip(chunk.index + 1, chunk.itertuples(index=False, name=None)):
+        try:
+            parsed = parse_row_to_record(row, idx)
+            if parsed.bl_record_id:
+                records.append(parsed)
+        except Exception as e:
+            errors.append((int(row_num), str(e)))
+    return records, errors
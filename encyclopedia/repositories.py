@@ -1,6 +1,25 @@
 # encyclopedia/repositories.py
-from .models import Comic
-from django.db import transaction
+from .models import Comic, SearchLog, sync_value_tables
+from .parsers import ParsedRecord
+from django.db import connection, transaction
+from django.db.models import Count, Exists, OuterRef
+from collections import Counter, defaultdict
+from heapq import nlargest
+from itertools import chain
+from operator import itemgetter
+import csv
+import io
+import json
+
+# Fields rewritten on conflict when bulk upserting; created_at keeps its first value.
+UPSERT_FIELDS = [
+    "title", "variant_titles", "authors", "publication_years",
+    "genres", "languages", "isbn", "other_fields",
+]
+# Column order used by bulk_copy_insert
+COPY_COLUMNS = ["bl_record_id", *UPSERT_FIELDS, "created_at"]
+# Multi-value fields merged as a union of old and new values
+LIST_FIELDS = ["variant_titles", "authors", "publication_years", "genres", "languages"]
 
 class ComicRepository:
     # SOLID: Single Responsibility Principle - repository only handles data access
@@ -9,36 +28,145 @@ class ComicRepository:
         return Comic.objects.filter(bl_record_id=bl_id).first()
 
     @staticmethod
-    def upsert_from_parsed(parsed: dict):
-        obj = Comic.objects.filter(bl_record_id=parsed["bl_record_id"]).first()
+    def upsert_from_parsed(parsed: ParsedRecord):
+        obj = Comic.objects.filter(bl_record_id=parsed.bl_record_id).first()
         if obj is None:
-            obj = Comic(bl_record_id=parsed["bl_record_id"])
-        # merge lists: union
-        obj.title = parsed["title"] or obj.title or parsed["title"]
-        obj.variant_titles = list({*obj.variant_titles, *parsed.get("variant_titles", [])}) if obj.pk else parsed.get("variant_titles", [])
-        obj.authors = list({*obj.authors, *parsed.get("authors", [])}) if obj.pk else parsed.get("authors", [])
-        obj.publication_years = list({*obj.publication_years, *parsed.get("publication_years", [])}) if obj.pk else parsed.get("publication_years", [])
-        obj.genres = list({*obj.genres, *parsed.get("genres", [])}) if obj.pk else parsed.get("genres", [])
-        obj.languages = list({*obj.languages, *parsed.get("languages", [])}) if obj.pk else parsed.get("languages", [])
-        obj.isbn = parsed.get("isbn", ["missing"])
-        obj.other_fields = {**(obj.other_fields or {}), **parsed.get("other_fields", {})}
+            obj = Comic(bl_record_id=parsed.bl_record_id)
+        # merge lists: order-preserving union
+        obj.title = parsed.title or obj.title or parsed.title
+        for field in LIST_FIELDS:
+            new_values = getattr(parsed, field)
+            setattr(obj, field, list(dict.fromkeys(chain(getattr(obj, field), new_values))) if obj.pk else new_values)
+        obj.isbn = parsed.isbn
+        obj.other_fields = {**(obj.other_fields or {}), **parsed.other_fields}
         obj.save()
         return obj
 
+    @staticmethod
+    def _new_accumulator(bl_id, existing=None):
+        """
+        Starts a merge accumulator for one bl_record_id, seeded from an existing row if any.
+        List fields are dicts used as ordered sets until the batch is materialized.
+        """
+        acc = {
+            "bl_record_id": bl_id,
+            "title": existing.title if existing else "",
+            "isbn": existing.isbn if existing else ["missing"],
+            "other_fields": dict(existing.other_fields or {}) if existing else {},
+        }
+        for field in LIST_FIELDS:
+            acc[field] = dict.fromkeys(getattr(existing, field) if existing else [])
+        return acc
+
+    @staticmethod
+    def _fold_parsed(acc: dict, parsed: ParsedRecord):
+        """
+        Folds one parsed record into an accumulator using the same rules as
+        upsert_from_parsed (list union, last ISBN wins).
+        """
+        acc["title"] = parsed.title or acc["title"]
+        for field in LIST_FIELDS:
+            acc[field].update(dict.fromkeys(getattr(parsed, field)))
+        acc["isbn"] = parsed.isbn
+        acc["other_fields"].update(parsed.other_fields)
+
+    @staticmethod
+    def bulk_copy_insert(comics):
+        """
+        Inserts new Comic objects with PostgreSQL COPY ... FROM STDIN, which skips
+        per-row INSERT parsing entirely. COPY has no ON CONFLICT clause, so callers
+        must only pass comics whose bl_record_id is not in the table yet.
+        """
+        buf = io.StringIO()
+        # QUOTE_ALL so empty strings are not read back as NULL
+        writer = csv.writer(buf, quoting=csv.QUOTE_ALL)
+        for comic in comics:
+            writer.writerow(
+                [comic.bl_record_id, comic.title]
+                + [json.dumps(getattr(comic, field)) for field in UPSERT_FIELDS[1:]]
+                + [comic.created_at.isoformat()]
+            )
+        buf.seek(0)
+
+        columns = ", ".join(connection.ops.quote_name(c) for c in COPY_COLUMNS)
+        sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+            connection.ops.quote_name(Comic._meta.db_table), columns
+        )
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, "copy_expert"):  # psycopg2
+                raw.copy_expert(sql, buf)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buf.getvalue())
+        return len(comics)
+
+    @staticmethod
+    def bulk_upsert(parsed_list, batch_size=2000, use_copy=False):
+        """
+        Upserts many parsed records at once and returns the number of comics written.
+        Existing rows are pre-fetched with one query and merged in Python, then
+        everything is written with INSERT ... ON CONFLICT DO UPDATE.
+        With use_copy on PostgreSQL, rows that do not exist yet are loaded with
+        COPY instead (see bulk_copy_insert); the rest still go through ON CONFLICT.
+        SOLID: Single Responsibility - same merge rules as upsert_from_parsed, batched.
+        """
+        ids = list(dict.fromkeys(p.bl_record_id for p in parsed_list))
+        if not ids:
+            return 0
+        # in_bulk splits long id lists to stay under the backend's query parameter limit;
+        # created_at is never merged, so it is not loaded
+        existing = Comic.objects.only("bl_record_id", *UPSERT_FIELDS).in_bulk(ids, field_name="bl_record_id")
+
+        # Repeated ids are merged into one accumulator: ON CONFLICT cannot update a row twice
+        merged = {}
+        for parsed in parsed_list:
+            bl_id = parsed.bl_record_id
+            acc = merged.get(bl_id)
+            if acc is None:
+                acc = merged[bl_id] = ComicRepository._new_accumulator(bl_id, existing.get(bl_id))
+            ComicRepository._fold_parsed(acc, parsed)
+
+        copy_new = use_copy and connection.vendor == "postgresql"
+        objs = []
+        new_objs = []
+        for bl_id, acc in merged.items():
+            for field in LIST_FIELDS:
+                acc[field] = list(acc[field])
+            if copy_new and bl_id not in existing:
+                new_objs.append(Comic(**acc))
+            else:
+                objs.append(Comic(**acc))
+
+        with transaction.atomic():
+            if new_objs:
+                ComicRepository.bulk_copy_insert(new_objs)
+            if objs:
+                Comic.objects.bulk_create(
+                    objs,
+                    update_conflicts=True,
+                    unique_fields=["bl_record_id"],
+                    update_fields=UPSERT_FIELDS,
+                    batch_size=batch_size,
+                )
+            sync_value_tables(list(merged))
+        return len(objs) + len(new_objs)
+
     @staticmethod
     def filter_by_genre(genre):
         """
         Returns comics filtered by genre.
+        Matches whole genre values through the genre value table's unique name index,
+        which works on every backend (JSON containment is PostgreSQL-only).
         SOLID: Open/Closed - can add new filters without changing callers.
         """
-        return Comic.objects.filter(genres__contains=[genre])
+        return Comic.objects.filter(genre_values__name=genre)
 
     @staticmethod
     def group_by_author(comics):
         """
         Groups comics by author.
         """
-        from collections import defaultdict
         grouped = defaultdict(list)
         for comic in comics:
             for author in comic.authors:
@@ -50,13 +178,69 @@ class ComicRepository:
         """
         Groups comics by year of publication.
         """
-        from collections import defaultdict
         grouped = defaultdict(list)
         for comic in comics:
             for year in comic.publication_years:
                 grouped[year].append(comic)
         return grouped
 
+    @staticmethod
+    def _group_ids_by_list_field(field, queryset=None):
+        """
+        Maps each value of a multi-value field to the bl_record_ids of the comics
+        holding it, keys in sorted order. PostgreSQL unnests and groups in SQL;
+        other backends stream just the two columns and group in Python.
+        """
+        comics = Comic.objects.all() if queryset is None else queryset
+        # Subquery on pk so filtered, ordered or sliced querysets all work
+        scoped = Comic.objects.filter(pk__in=comics.values("pk"))
+        if connection.vendor == "postgresql":
+            sub_sql, sub_params = scoped.values("pk").query.sql_with_params()
+            qn = connection.ops.quote_name
+            sql = (
+                "SELECT v, array_agg(c.bl_record_id ORDER BY c.bl_record_id) "
+                "FROM {table} c, jsonb_array_elements_text(c.{col}) AS v "
+                "WHERE c.{pk} IN ({sub}) GROUP BY v ORDER BY v"
+            ).format(table=qn(Comic._meta.db_table), col=qn(field), pk=qn(Comic._meta.pk.column), sub=sub_sql)
+            with connection.cursor() as cursor:
+                cursor.execute(sql, sub_params)
+                return dict(cursor.fetchall())
+
+        grouped = defaultdict(list)
+        rows = scoped.order_by("bl_record_id").values_list("bl_record_id", field).iterator(chunk_size=2000)
+        for bl_id, values in rows:
+            for value in values:
+                grouped[value].append(bl_id)
+        return dict(sorted(grouped.items()))
+
+    @staticmethod
+    def group_by_author_db(queryset=None):
+        """
+        Groups comic ids by author in the database.
+        Prefer this over group_by_author for large querysets: no Comic objects are built.
+        """
+        return ComicRepository._group_ids_by_list_field("authors", queryset)
+
+    @staticmethod
+    def group_by_year_db(queryset=None):
+        """
+        Groups comic ids by year of publication in the database.
+        Prefer this over group_by_year for large querysets: no Comic objects are built.
+        """
+        return ComicRepository._group_ids_by_list_field("publication_years", queryset)
+
+    @staticmethod
+    def value_names(m2m_name, limit=None):
+        """
+        Returns the distinct values of a multi-value field in name order, e.g.
+        value_names("author_values", 20), skipping values no comic links to any more.
+        Reads the value table and its unique name index rather than every comic's JSON.
+        """
+        m2m = Comic._meta.get_field(m2m_name)
+        linked = m2m.remote_field.through.objects.filter(**{m2m.m2m_reverse_field_name(): OuterRef("pk")})
+        names = m2m.related_model.objects.filter(Exists(linked)).order_by("name").values_list("name", flat=True)
+        return list(names[:limit] if limit is not None else names)
+
     @staticmethod
     def sort_by_title(comics, order="asc"):
         """
@@ -90,21 +274,51 @@ class ComicRepository:
         """
         Returns top 10 search queries from SearchLog.
         """
-        from .models import SearchLog
-        from django.db.models import Count
         return SearchLog.objects.values('query_text').annotate(count=Count('id')).order_by('-count')[:10]
 
+    @staticmethod
+    def count_search_result_ids(threshold=None, limit=None):
+        """
+        Returns (bl_record_id, count) pairs for how often each comic appeared in
+        search results, most frequent first. On PostgreSQL the result_ids arrays
+        are unnested and counted in SQL; other backends count in Python.
+        """
+        if connection.vendor == "postgresql":
+            sql = (
+                "SELECT rid, COUNT(*) AS c FROM {table}, jsonb_array_elements_text({table}.result_ids) AS rid "
+                "GROUP BY rid"
+            ).format(table=connection.ops.quote_name(SearchLog._meta.db_table))
+            params = []
+            if threshold is not None:
+                sql += " HAVING COUNT(*) > %s"
+                params.append(threshold)
+            sql += " ORDER BY c DESC"
+            if limit is not None:
+                sql += " LIMIT %s"
+                params.append(limit)
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+
+        # Stream only the result_ids column and count each log as it arrives
+        counter = Counter()
+        for result_ids in SearchLog.objects.values_list("result_ids", flat=True).iterator(chunk_size=2000):
+            counter.update(result_ids)
+        if threshold is None:
+            return counter.most_common(limit)
+        # Drop ids at or under the threshold before sorting, like HAVING before ORDER BY
+        frequent = ((item, count) for item, count in counter.items() if count > threshold)
+        if limit is not None:
+            # Heap selection: O(N log limit) instead of sorting every survivor
+            return nlargest(limit, frequent, key=itemgetter(1))
+        return sorted(frequent, key=itemgetter(1), reverse=True)
+
     @staticmethod
     def get_top_search_results():
         """
         Returns top 10 comics by number of times in search results.
         """
-        from .models import SearchLog
-        from collections import Counter
-        all_ids = []
-        for log in SearchLog.objects.all():
-            all_ids.extend(log.result_ids)
-        top_ids = [item for item, _ in Counter(all_ids).most_common(10)]
+        top_ids = [item for item, _ in ComicRepository.count_search_result_ids(limit=10)]
         return Comic.objects.filter(bl_record_id__in=top_ids)
 
     @staticmethod
@@ -112,11 +326,5 @@ class ComicRepository:
         """
         Returns comics included in more than threshold search results.
         """
-        from .models import SearchLog
-        from collections import Counter
-        all_ids = []
-        for log in SearchLog.objects.all():
-            all_ids.extend(log.result_ids)
-        counter = Counter(all_ids)
-        ids = [item for item, count in counter.items() if count > threshold]
+        ids = [item for item, _ in ComicRepository.count_search_result_ids(threshold=threshold)]
         return Comic.objects.filter(bl_record_id__in=ids)
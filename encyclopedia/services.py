@@ -1,13 +1,57 @@
 # encyclopedia/services.py
 from .models import Comic, SearchLog
-from django.db.models import Q
+from .repositories import ComicRepository
+from django.core.cache import cache
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.db.models import Count, Q, QuerySet
+from django.db.models.functions import Lower
 from typing import List, Dict, Optional, Any
 from abc import ABC, abstractmethod
+from collections import defaultdict
+import atexit
+import hashlib
+import json
 import logging
+import threading
+import time
 
 # Set up logging for debugging
 logger = logging.getLogger(__name__)
 
+# Comic columns loaded for search results: what search_results.html renders (other
+# fields through get_multi_value_fields), plus title for sorting and authors and
+# publication_years for grouping. languages and created_at are never shown there.
+SEARCH_RESULT_FIELDS = (
+    "bl_record_id", "title", "variant_titles", "authors", "publication_years",
+    "genres", "isbn", "other_fields",
+)
+# Fields search_list.html renders
+SEARCH_LIST_FIELDS = ("bl_record_id", "title", "authors", "publication_years", "isbn")
+# Default fields of search_values() rows: enough to list and group results
+SEARCH_VALUE_FIELDS = ("bl_record_id", "title", "authors", "publication_years")
+# Cap on the number of comics one search returns and logs
+MAX_SEARCH_RESULTS = 10000
+# Buffered search logs are written every SEARCH_LOG_FLUSH_INTERVAL seconds,
+# or sooner once SEARCH_LOG_MAX_PENDING are waiting
+SEARCH_LOG_FLUSH_INTERVAL = 1.0
+SEARCH_LOG_MAX_PENDING = 100
+# Attempts at writing a batch of search logs while the database reports it is busy
+SEARCH_LOG_WRITE_ATTEMPTS = 3
+# Result ids of recent searches are reused for SEARCH_CACHE_TTL seconds
+SEARCH_CACHE_TTL = 60
+# Larger result sets, and unfiltered searches, are not cached: reloading that many
+# ids by primary key costs more than running the search again
+SEARCH_CACHE_MAX_IDS = 1000
+# Cache key of the total number of comics shown while browsing
+COMIC_COUNT_CACHE_KEY = "comics:count"
+# Cache keys of the reports page sections, each kept for REPORTS_CACHE_TTL seconds
+REPORT_CACHE_KEYS = {
+    "top_queries": "reports:top_queries",
+    "top_results": "reports:top_results",
+    "high_freq": "reports:high_freq",
+}
+REPORTS_CACHE_TTL = 60
+
 # SOLID PRINCIPLE: Interface Segregation Principle (ISP)
 # We create separate, focused interfaces rather than one large interface
 # Each interface has a single, specific responsibility
@@ -17,7 +61,8 @@ class SearchFilterInterface(ABC):
     This ensures classes only depend on methods they actually use
     """
     @abstractmethod
-    def apply_filter(self, queryset, value) -> Any:
+    def build_q(self, value) -> Q:
+        """Returns the filter condition for value; an empty Q() matches everything."""
         pass
     
     @abstractmethod
@@ -42,6 +87,19 @@ class GroupStrategyInterface(ABC):
     def group(self, results: List[Comic]) -> Dict:
         pass
 
+def _value_match_q(m2m_name, values) -> Q:
+    """
+    Matches comics with at least one value of a multi-value field containing any
+    of values (case-insensitive), looked up in the field's value table.
+    A pk__in subquery, so a comic with several matching values appears once.
+    """
+    m2m = Comic._meta.get_field(m2m_name)
+    value_field = m2m.m2m_reverse_field_name()
+    names = Q()
+    for value in values:
+        names |= Q(**{f"{value_field}__name__icontains": value})
+    return Q(pk__in=m2m.remote_field.through.objects.filter(names).values(m2m.m2m_field_name()))
+
 # SOLID PRINCIPLE: Single Responsibility Principle (SRP)
 # Each filter class has only ONE responsibility - filtering by a specific field
 # If we need to change how genre filtering works, we only modify GenreFilter
@@ -53,14 +111,11 @@ class GenreFilter(SearchFilterInterface):
     def get_filter_name(self) -> str:
         return "Genre"
     
-    def apply_filter(self, queryset, value):
+    def build_q(self, value) -> Q:
         if not value or not value.strip():
-            return queryset
+            return Q()
         
-        value = value.strip()
-        # Use only icontains for SQLite compatibility
-        filtered_qs = queryset.filter(genres__icontains=value)
-        return filtered_qs
+        return _value_match_q("genre_values", [value.strip()])
 
 class AuthorFilter(SearchFilterInterface):
     """
@@ -70,14 +125,11 @@ class AuthorFilter(SearchFilterInterface):
     def get_filter_name(self) -> str:
         return "Author"
     
-    def apply_filter(self, queryset, value):
+    def build_q(self, value) -> Q:
         if not value or not value.strip():
-            return queryset
+            return Q()
         
-        value = value.strip()
-        # Use only icontains for SQLite compatibility
-        filtered_qs = queryset.filter(authors__icontains=value)
-        return filtered_qs
+        return _value_match_q("author_values", [value.strip()])
 
 class YearFilter(SearchFilterInterface):
     """
@@ -87,14 +139,11 @@ class YearFilter(SearchFilterInterface):
     def get_filter_name(self) -> str:
         return "Year"
     
-    def apply_filter(self, queryset, value):
+    def build_q(self, value) -> Q:
         if not value or not value.strip():
-            return queryset
+            return Q()
         
-        value = value.strip()
-        # Use only icontains for SQLite compatibility
-        filtered_qs = queryset.filter(publication_years__icontains=value)
-        return filtered_qs
+        return _value_match_q("year_values", [value.strip()])
 
 class TitleFilter(SearchFilterInterface):
     """
@@ -104,16 +153,12 @@ class TitleFilter(SearchFilterInterface):
     def get_filter_name(self) -> str:
         return "Title"
     
-    def apply_filter(self, queryset, value):
+    def build_q(self, value) -> Q:
         if not value or not value.strip():
-            return queryset
+            return Q()
         
         value = value.strip()
-        filtered_qs = queryset.filter(
-            Q(title__icontains=value) |
-            Q(variant_titles__icontains=value)
-        )
-        return filtered_qs
+        return Q(title__icontains=value) | Q(variant_titles__icontains=value)
 
 class LanguageFilter(SearchFilterInterface):
     """
@@ -123,9 +168,9 @@ class LanguageFilter(SearchFilterInterface):
     def get_filter_name(self) -> str:
         return "Language"
     
-    def apply_filter(self, queryset, value):
+    def build_q(self, value) -> Q:
         if not value:
-            return queryset
+            return Q()
         
         # Handle both list and string inputs
         if isinstance(value, str):
@@ -134,14 +179,9 @@ class LanguageFilter(SearchFilterInterface):
             languages = [lang.strip() for lang in value if lang and lang.strip()]
         
         if not languages:
-            return queryset
-        
-        q = Q()
-        for lang in languages:
-            q |= Q(languages__icontains=lang)
+            return Q()
         
-        filtered_qs = queryset.filter(q)
-        return filtered_qs
+        return _value_match_q("language_values", languages)
 
 class EditionFilter(SearchFilterInterface):
     """
@@ -151,13 +191,12 @@ class EditionFilter(SearchFilterInterface):
     def get_filter_name(self) -> str:
         return "Edition"
     
-    def apply_filter(self, queryset, value):
+    def build_q(self, value) -> Q:
         if not value or not value.strip():
-            return queryset
+            return Q()
         
-        value = value.strip()
-        filtered_qs = queryset.filter(other_fields__icontains=value)
-        return filtered_qs
+        # Only the editions key, not the whole other_fields blob (notes, topics, ...)
+        return Q(other_fields__editions__icontains=value.strip())
 
 class NameTypeFilter(SearchFilterInterface):
     """
@@ -167,13 +206,11 @@ class NameTypeFilter(SearchFilterInterface):
     def get_filter_name(self) -> str:
         return "Name Type"
     
-    def apply_filter(self, queryset, value):
+    def build_q(self, value) -> Q:
         if not value or not value.strip():
-            return queryset
+            return Q()
         
-        value = value.strip()
-        filtered_qs = queryset.filter(other_fields__icontains=value)
-        return filtered_qs
+        return Q(other_fields__name_type__icontains=value.strip())
 
 # SOLID PRINCIPLE: Strategy Pattern (part of Open/Closed Principle)
 # We can add new sorting algorithms without modifying existing code
@@ -184,10 +221,23 @@ class AlphabeticalSortStrategy(SortStrategyInterface):
     """
     def __init__(self, reverse=False):
         self.reverse = reverse
+        # Case-insensitive, ties broken by the raw title like the stable Python sort
+        title = Lower("title")
+        self.ordering = (title.desc() if reverse else title, "title")
     
     def sort(self, results: List[Comic]) -> List[Comic]:
+        if isinstance(results, QuerySet):
+            # Sort in SQL (backed by comic_title_lower_idx) instead of in Python
+            return results.order_by(*self.ordering)
         return sorted(results, key=lambda c: (c.title or "").lower(), reverse=self.reverse)
 
+# Group key for comics with no authors / years
+_UNKNOWN = ("Unknown",)
+
+def _field(comic, name):
+    # Group strategies accept Comic instances or search_values() dicts
+    return comic[name] if isinstance(comic, dict) else getattr(comic, name)
+
 # SOLID PRINCIPLE: Strategy Pattern - interchangeable grouping algorithms
 # Each grouping strategy can be swapped without affecting other parts of the system
 class AuthorGroupStrategy(GroupStrategyInterface):
@@ -196,12 +246,12 @@ class AuthorGroupStrategy(GroupStrategyInterface):
     SOLID LSP: Can be substituted for any GroupStrategyInterface
     """
     def group(self, results: List[Comic]) -> Dict:
-        groups = {}
+        groups = defaultdict(list)
         for comic in results:
-            authors = comic.authors or ["Unknown"]
-            for author in authors:
-                groups.setdefault(author, []).append(comic)
-        return groups
+            for author in _field(comic, "authors") or _UNKNOWN:
+                groups[author].append(comic)
+        # Plain dict: template lookups on a defaultdict would insert missing keys
+        return dict(groups)
 
 class YearGroupStrategy(GroupStrategyInterface):
     """
@@ -209,12 +259,172 @@ class YearGroupStrategy(GroupStrategyInterface):
     SOLID OCP: Can be extended with new year grouping logic without modification
     """
     def group(self, results: List[Comic]) -> Dict:
-        groups = {}
+        groups = defaultdict(list)
         for comic in results:
-            years = comic.publication_years or ["Unknown"]
-            for year in years:
-                groups.setdefault(year, []).append(comic)
-        return groups
+            for year in _field(comic, "publication_years") or _UNKNOWN:
+                groups[year].append(comic)
+        # Plain dict: template lookups on a defaultdict would insert missing keys
+        return dict(groups)
+
+def _clean_param(value):
+    """
+    Strips a search parameter; blank strings and empty lists become None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value.strip() or None
+    if isinstance(value, list):
+        # Handle list parameters (like languages): drop falsy and blank items
+        return [item for item in map(str.strip, map(str, filter(None, value))) if item] or None
+    return value
+
+class SearchLogWriter:
+    """
+    Buffers SearchLog rows and writes them in batches from a background thread,
+    so logging a search costs the request no database round trip.
+    synchronous=True writes each log as it is added instead; the default (None)
+    does so on SQLite, whose single writer lock the thread would compete for.
+    
+    SOLID SRP: Single Responsibility - only handles persisting search logs
+    """
+    def __init__(self, interval=SEARCH_LOG_FLUSH_INTERVAL, max_pending=SEARCH_LOG_MAX_PENDING,
+                 synchronous=None):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.synchronous = synchronous
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, log: SearchLog):
+        # The writer thread cannot see an open transaction of the caller's
+        # (e.g. ATOMIC_REQUESTS or a test case), so write inline there
+        if connection.in_atomic_block:
+            log.save()
+            return
+        synchronous = connection.vendor == "sqlite" if self.synchronous is None else self.synchronous
+        if synchronous:
+            self._write([log])
+            return
+        with self._lock:
+            self._pending.append(log)
+            full = len(self._pending) >= self.max_pending
+            # Started on first use rather than at import, so every forked worker gets its own
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="search-log-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """
+        Writes every pending log with one bulk_create.
+        """
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch):
+        """
+        Inserts the batch, retrying while the database is locked or busy.
+        Logging must never break searching, so a batch that still fails is
+        dropped with a warning naming its queries.
+        """
+        for attempt in range(1, SEARCH_LOG_WRITE_ATTEMPTS + 1):
+            try:
+                SearchLog.objects.bulk_create(batch, batch_size=500)
+                return
+            except OperationalError as exc:  # e.g. SQLite's "database is locked"
+                error = exc
+                if attempt < SEARCH_LOG_WRITE_ATTEMPTS:
+                    time.sleep(0.05 * attempt)
+            except Exception as exc:
+                error = exc
+                break
+        logger.warning("Dropped %d search logs: %s", len(batch),
+                       ", ".join(repr(log.query_text) for log in batch), exc_info=error)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+            close_old_connections()
+
+search_log_writer = SearchLogWriter()
+
+class SearchResultCache:
+    """
+    Search result ids in Django's cache, keyed by a hash of the applied filters and order,
+    so every worker process shares them when CACHES points at Redis or memcached.
+    Only ids are kept, so a hit still loads current field values in one id lookup.
+    
+    SOLID SRP: Single Responsibility - only remembers recent search results
+    """
+    def __init__(self, ttl=SEARCH_CACHE_TTL, prefix="search"):
+        self.ttl = ttl
+        self.prefix = prefix
+        self._version_key = f"{prefix}:version"
+
+    def _key(self, key):
+        # Entries are namespaced by a version key, so clear() is one write whatever the backend
+        version = cache.get_or_set(self._version_key, time.time_ns, None)
+        digest = hashlib.blake2b(json.dumps(key).encode(), digest_size=16).hexdigest()
+        return f"{self.prefix}:{version}:{digest}"
+
+    def get(self, key):
+        return cache.get(self._key(key))
+
+    def set(self, key, ids):
+        cache.set(self._key(key), tuple(ids), self.ttl)
+
+    def clear(self):
+        # Older entries become unreachable and expire on their own
+        cache.set(self._version_key, time.time_ns(), None)
+
+search_result_cache = SearchResultCache()
+
+def clear_comic_caches():
+    """
+    Drops everything cached about the comics table: search result ids, the browse count
+    and the reports, which show comic titles.
+    Called after every Comic save/delete commits, and by bulk writers, which send no signals.
+    """
+    search_result_cache.clear()
+    cache.delete_many([COMIC_COUNT_CACHE_KEY, *REPORT_CACHE_KEYS.values()])
+
+def clear_comic_caches_on_commit(sender, using, **kwargs):
+    """
+    post_save/post_delete receiver for Comic, connected in EncyclopediaConfig.ready().
+    Clears once the write commits, so no request can re-cache the rows it replaced.
+    Bulk imports that skip clear_comic_caches() are bounded by the cache timeouts.
+    """
+    transaction.on_commit(clear_comic_caches, using=using)
+
+# Default strategies, built once and shared by every ComicSearchService.
+# They are shared across threads and requests, so they must stay stateless
+# (AlphabeticalSortStrategy only holds its fixed direction and ordering).
+DEFAULT_FILTERS = {
+    'genre': GenreFilter(),
+    'author': AuthorFilter(),
+    'year': YearFilter(),
+    'title': TitleFilter(),
+    'languages': LanguageFilter(),
+    'edition': EditionFilter(),
+    'name_type': NameTypeFilter(),
+}
+DEFAULT_SORT_STRATEGIES = {
+    'asc': AlphabeticalSortStrategy(reverse=False),
+    'desc': AlphabeticalSortStrategy(reverse=True),
+}
+DEFAULT_GROUP_STRATEGIES = {
+    'author': AuthorGroupStrategy(),
+    'year': YearGroupStrategy(),
+}
 
 # SOLID PRINCIPLE: Dependency Inversion Principle (DIP)
 # This class depends on abstractions (interfaces) not concrete implementations
@@ -229,29 +439,15 @@ class ComicSearchService:
     SOLID DIP: Depends on abstractions (interfaces) not concrete classes
     """
     
-    def __init__(self):
+    def __init__(self, filters=None, sort_strategies=None, group_strategies=None):
         # SOLID DIP: Dependency Injection - we inject strategy objects (abstractions)
         # rather than creating concrete classes directly
         # This makes the system flexible and testable
-        self.filters = {
-            'genre': GenreFilter(),
-            'author': AuthorFilter(),
-            'year': YearFilter(),
-            'title': TitleFilter(),
-            'languages': LanguageFilter(),
-            'edition': EditionFilter(),
-            'name_type': NameTypeFilter(),
-        }
+        self.filters = DEFAULT_FILTERS if filters is None else filters
         # SOLID OCP: We can add new sorting strategies without modifying existing code
-        self.sort_strategies = {
-            'asc': AlphabeticalSortStrategy(reverse=False),
-            'desc': AlphabeticalSortStrategy(reverse=True),
-        }
+        self.sort_strategies = DEFAULT_SORT_STRATEGIES if sort_strategies is None else sort_strategies
         # SOLID LSP: All group strategies are interchangeable
-        self.group_strategies = {
-            'author': AuthorGroupStrategy(),
-            'year': YearGroupStrategy(),
-        }
+        self.group_strategies = DEFAULT_GROUP_STRATEGIES if group_strategies is None else group_strategies
 
     def _clean_search_params(self, **kwargs) -> Dict[str, Any]:
         """
@@ -260,28 +456,15 @@ class ComicSearchService:
         SOLID SRP: Single Responsibility - this method ONLY handles parameter cleaning
         It doesn't search, filter, or do anything else - just cleans data
         """
-        cleaned = {}
-        
-        for key, value in kwargs.items():
-            if value is None:
-                cleaned[key] = None
-            elif isinstance(value, str):
-                stripped = value.strip()
-                cleaned[key] = stripped if stripped else None
-            elif isinstance(value, list):
-                # Handle list parameters (like languages)
-                clean_list = [item.strip() for item in value if item and str(item).strip()]
-                cleaned[key] = clean_list if clean_list else None
-            else:
-                cleaned[key] = value
-        
-        return cleaned
+        return {key: _clean_param(value) for key, value in kwargs.items()}
 
     def search(self, title_query: str = None, genre: str = None, author: str = None,
                year: str = None, edition: str = None, languages: List[str] = None,
-               name_type: str = None) -> List[Comic]:
+               name_type: str = None, order: str = "asc") -> List[Comic]:
         """
         Advanced search supporting multiple parameters.
+        Results come back sorted by title in the given order ('asc' or 'desc'),
+        sorted by the database.
         
         SOLID OCP: Open/Closed Principle - we can add new search parameters 
         by creating new filter classes without modifying this method
@@ -289,6 +472,66 @@ class ComicSearchService:
         SOLID DIP: Dependency Inversion - this method depends on the 
         SearchFilterInterface abstraction, not concrete filter implementations
         """
+        q, applied_filters = self._build_filter_q(
+            title_query=title_query, genre=genre, author=author, year=year,
+            edition=edition, languages=languages, name_type=name_type,
+        )
+        
+        cache_key = self._cache_key(applied_filters, order)
+        result_ids = self._get_cached_ids(cache_key)
+        if result_ids is None:
+            # All filter conditions are AND-ed into one WHERE clause and run as one query
+            qs = Comic.objects.filter(q).only(*SEARCH_RESULT_FIELDS).order_by("title")
+            qs = self.sort_results(qs, order)
+            results = list(qs[:MAX_SEARCH_RESULTS])
+            result_ids = [c.bl_record_id for c in results]
+            self._set_cached_ids(cache_key, result_ids)
+        else:
+            # Repeat search: skip the filtering scan, load the known ids in their cached order
+            by_id = Comic.objects.only(*SEARCH_RESULT_FIELDS).in_bulk(result_ids, field_name="bl_record_id")
+            results = [by_id[bl_id] for bl_id in result_ids if bl_id in by_id]
+            result_ids = [c.bl_record_id for c in results]
+        
+        self._log_search(applied_filters, result_ids)
+        return results
+
+    def search_values(self, fields=SEARCH_VALUE_FIELDS, order: str = "asc", **params) -> List[Dict[str, Any]]:
+        """
+        Same search as search(), returning one dict of the given fields per comic
+        instead of Comic instances; bl_record_id is always included.
+        For callers that list or group results without rendering full records:
+        rows skip model construction and decoding the JSON fields not asked for.
+        """
+        if "bl_record_id" not in fields:
+            fields = ("bl_record_id", *fields)
+        q, applied_filters = self._build_filter_q(**params)
+        
+        cache_key = self._cache_key(applied_filters, order)
+        result_ids = self._get_cached_ids(cache_key)
+        if result_ids is None:
+            qs = self.sort_results(Comic.objects.filter(q).order_by("title"), order)
+            rows = list(qs.values(*fields)[:MAX_SEARCH_RESULTS])
+            result_ids = [row["bl_record_id"] for row in rows]
+            self._set_cached_ids(cache_key, result_ids)
+        else:
+            qs = Comic.objects.filter(bl_record_id__in=result_ids).values(*fields)
+            by_id = {row["bl_record_id"]: row for row in qs}
+            rows = [by_id[bl_id] for bl_id in result_ids if bl_id in by_id]
+            result_ids = [row["bl_record_id"] for row in rows]
+        
+        self._log_search(applied_filters, result_ids)
+        return rows
+
+    def _build_filter_q(self, title_query: str = None, genre: str = None, author: str = None,
+                        year: str = None, edition: str = None, languages: List[str] = None,
+                        name_type: str = None):
+        """
+        Cleans the search parameters and AND-s the matching filters into one Q.
+        Returns (q, applied_filters), the latter as "name=value" strings for logging.
+        """
+        if not any((title_query, genre, author, year, edition, languages, name_type)):
+            # Empty search (e.g. the landing page): nothing to clean or filter
+            return Q(), []
         # SOLID SRP: Delegate parameter cleaning to a focused method
         params = self._clean_search_params(
             title_query=title_query,
@@ -300,9 +543,6 @@ class ComicSearchService:
             name_type=name_type
         )
         
-        # Start with all comics
-        qs = Comic.objects.all()
-        
         # SOLID OCP & DIP: Apply filters using strategy pattern
         # We can add new filters without changing this code
         search_params = {
@@ -319,36 +559,53 @@ class ComicSearchService:
         applied_filters = []
         
         # SOLID LSP: All filters implement the same interface and can be substituted
+        q = Q()
         for param_name, param_value in search_params.items():
             if param_value and param_name in self.filters:
                 # SOLID DIP: We call the interface method, not knowing the concrete implementation
-                qs = self.filters[param_name].apply_filter(qs, param_value)
+                q &= self.filters[param_name].build_q(param_value)
                 applied_filters.append(f"{param_name}={param_value}")
-                
-                # Early exit if no results
-                if not qs.exists():
-                    break
-        
-        # Convert to list and limit results
-        results = list(qs.order_by("title")[:10000])
-        
-        # Log the search for analytics
+        return q, applied_filters
+
+    def _cache_key(self, applied_filters, order):
+        """
+        Result cache key of a search, or None for an unfiltered search, which is not
+        cached. search_result_cache is shared by every service, so the key names the
+        filter and sort classes used, not just the parameters.
+        """
+        if not applied_filters:
+            return None
+        strategies = [self.filters[f.split("=", 1)[0]] for f in applied_filters]
+        strategies.append(self.sort_strategies.get(order))
+        names = [f"{type(s).__module__}.{type(s).__qualname__}" for s in strategies]
+        return (tuple(applied_filters), order, tuple(names))
+
+    def _get_cached_ids(self, cache_key):
+        return None if cache_key is None else search_result_cache.get(cache_key)
+
+    def _set_cached_ids(self, cache_key, result_ids):
+        if cache_key is not None and len(result_ids) <= SEARCH_CACHE_MAX_IDS:
+            search_result_cache.set(cache_key, result_ids)
+
+    def _log_search(self, applied_filters, result_ids):
+        """
+        Logs the search for analytics; ids come from the rows already fetched.
+        """
         query_text = " AND ".join(applied_filters) if applied_filters else "empty_search"
         try:
-            SearchLog.objects.create(
+            search_log_writer.add(SearchLog(
                 query_text=query_text,
-                result_ids=[c.bl_record_id for c in results],
-                num_results=len(results)
-            )
+                result_ids=result_ids,
+                num_results=len(result_ids)
+            ))
         except Exception:
             # Silently fail if logging doesn't work
             pass
-        
-        return results
 
     def group(self, results: List[Comic], by: str = "author") -> Dict:
         """
         Groups comics using strategy pattern.
+        Strategies read the list fields search() already loaded, so grouping runs no queries.
         
         SOLID OCP: Open/Closed - we can add new grouping strategies without modifying this method
         SOLID LSP: Liskov Substitution - all group strategies are interchangeable
@@ -362,6 +619,7 @@ class ComicSearchService:
     def sort_results(self, results: List[Comic], order: str = "asc") -> List[Comic]:
         """
         Sorts comics using strategy pattern.
+        Accepts a list or a queryset; a queryset is ordered in SQL and stays lazy.
         
         SOLID OCP: Open/Closed - we can add new sorting algorithms without changing this code
         SOLID LSP: All sort strategies implement the same interface and are substitutable
@@ -374,66 +632,80 @@ class ComicSearchService:
 
     def top_queries(self, limit=10):
         """
-        Returns top search queries.
+        Returns top search queries as (query_text, count) pairs, counted in SQL.
         """
-        qs = SearchLog.objects.order_by("-timestamp")
-        aggregated = {}
-        for s in SearchLog.objects.all():
-            aggregated[s.query_text] = aggregated.get(s.query_text, 0) + 1
-        items = sorted(aggregated.items(), key=lambda kv: kv[1], reverse=True)[:limit]
-        return items
+        search_log_writer.flush()  # include searches still waiting in the buffer
+        qs = (
+            SearchLog.objects.values_list("query_text")
+            .annotate(c=Count("id"))
+            .order_by("-c", "query_text")
+        )
+        return list(qs[:limit])
 
     def top_results(self, limit=10):
         """
         Returns top search results.
         """
-        counts = {}
-        for log in SearchLog.objects.all():
-            for rid in log.result_ids:
-                counts[rid] = counts.get(rid, 0) + 1
-        items = sorted(counts.items(), key=lambda kv: kv[1], reverse=True)[:limit]
-        comics = []
-        for rid, cnt in items:
-            comic = Comic.objects.filter(bl_record_id=rid).first()
-            comics.append((comic, cnt))
-        return comics
+        search_log_writer.flush()  # include searches still waiting in the buffer
+        items = ComicRepository.count_search_result_ids(limit=limit)
+        comics_by_id = self._comics_by_id([rid for rid, _ in items])
+        return [(comics_by_id.get(rid), cnt) for rid, cnt in items]
 
     def names_in_more_than_n_results(self, n=100):
         """
         Returns comic names included in more than n search results.
         """
-        counts = {}
-        for log in SearchLog.objects.all():
-            for rid in log.result_ids:
-                counts[rid] = counts.get(rid, 0) + 1
-        out = []
-        for rid, cnt in counts.items():
-            if cnt > n:
-                comic = Comic.objects.filter(bl_record_id=rid).first()
-                if comic:
-                    out.append((comic.title, cnt))
-        return out
+        search_log_writer.flush()  # include searches still waiting in the buffer
+        frequent = ComicRepository.count_search_result_ids(threshold=n)
+        comics_by_id = self._comics_by_id([rid for rid, _ in frequent])
+        return [(comics_by_id[rid].title, cnt) for rid, cnt in frequent if rid in comics_by_id]
+
+    def _comics_by_id(self, ids):
+        """
+        Fetches the comics for a list of bl_record_ids in one query, keyed by id.
+        Only the fields the reports page shows are loaded.
+        """
+        return Comic.objects.only("bl_record_id", "title", "authors").in_bulk(ids, field_name="bl_record_id")
 
     # Search list management (in-memory, per session)
+    def _session_search_list(self, session):
+        """
+        Returns the session's search list as an insertion-ordered dict of bl_record_ids.
+        Sessions are JSON-serialized, so a dict stands in for an ordered set with O(1) lookups.
+        """
+        stored = session.get('search_list') or {}
+        # Sessions saved before the dict format still hold a plain list
+        return stored if isinstance(stored, dict) else dict.fromkeys(stored, True)
+
     def add_to_search_list(self, session, comic_id):
         """
         Adds a comic to the user's search list in session.
         SOLID: Single Responsibility - only manages search list.
         """
-        search_list = session.get('search_list', [])
+        search_list = self._session_search_list(session)
+        # Re-adding a listed comic changes nothing, so the session is not re-saved
         if comic_id not in search_list:
-            search_list.append(comic_id)
-        session['search_list'] = search_list
+            search_list[comic_id] = True
+            session['search_list'] = search_list
+
+    def remove_from_search_list(self, session, comic_id):
+        """
+        Removes a comic from the user's search list in session.
+        """
+        search_list = self._session_search_list(session)
+        if search_list.pop(comic_id, None):
+            session['search_list'] = search_list
 
     def clear_search_list(self, session):
         """
         Clears the user's search list in session.
         """
-        session['search_list'] = []
+        session.pop('search_list', None)
 
     def get_search_list(self, session):
         """
-        Returns the user's search list comics.
+        Returns the user's search list comics in the order they were added.
         """
-        ids = session.get('search_list', [])
-        return Comic.objects.filter(bl_record_id__in=ids)
+        ids = list(self._session_search_list(session))
+        by_id = Comic.objects.only(*SEARCH_LIST_FIELDS).in_bulk(ids, field_name="bl_record_id")
+        return [by_id[bl_id] for bl_id in ids if bl_id in by_id]
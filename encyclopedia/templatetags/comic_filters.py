@@ -1,27 +1,37 @@
+import re
+from functools import lru_cache
 from django import template
 
 register = template.Library()
 
-@register.filter
+# Special cases applied after title-casing, matched as whole words in one pass
+FIELD_NAME_REPLACEMENTS = {
+    'Isbn': 'ISBN',
+    'Bl Record Id': 'BL Record ID',
+    'Id': 'ID',
+}
+_FIELD_NAME_RE = re.compile(r'\b(Bl Record Id|Isbn|Id)\b')
+
+@lru_cache(maxsize=512)
+def _title_space(text):
+    # Shared by both filters; labels come from a small fixed set of keys
+    return text.replace('_', ' ').title()
+
+@lru_cache(maxsize=256)
+def _format_field_name(text):
+    return _FIELD_NAME_RE.sub(lambda m: FIELD_NAME_REPLACEMENTS[m.group(0)], _title_space(text))
+
+# is_safe: neither filter introduces HTML-unsafe characters, so safe input stays safe
+@register.filter(is_safe=True)
 def replace_underscore(value):
     """Replace underscores with spaces and title case the result."""
     if value:
-        return str(value).replace('_', ' ').title()
+        return _title_space(str(value))
     return value
 
-@register.filter
+@register.filter(is_safe=True)
 def format_field_name(value):
     """Format field names for display."""
     if value:
-        # Replace underscores with spaces and title case
-        formatted = str(value).replace('_', ' ').title()
-        # Handle special cases
-        replacements = {
-            'Isbn': 'ISBN',
-            'Bl Record Id': 'BL Record ID',
-            'Id': 'ID',
-        }
-        for old, new in replacements.items():
-            formatted = formatted.replace(old, new)
-        return formatted
-    return value
\ No newline at end of file
+        return _format_field_name(str(value))
+    return value
@@ -0,0 +1,138 @@
+import codecs
+import io
+import os
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase
+from encyclopedia.management.commands.import_comics import Command, detect_encoding
+from encyclopedia.models import Comic, Genre
+from encyclopedia.parsers import ParsedRecord
+from encyclopedia.repositories import ComicRepository
+
+class TestFlushBatch(TestCase):
+    def test_failed_batch_is_retried_row_by_row(self):
+        batch = [ParsedRecord(bl_record_id=bl_id, title=bl_id, authors=["Alice"]) for bl_id in ["1", "bad", "2"]]
+        upsert = ComicRepository.upsert_from_parsed
+
+        def upsert_row(parsed):
+            if parsed.bl_record_id == "bad":
+                raise DatabaseError("value too long")
+            return upsert(parsed)
+
+        with mock.patch.object(ComicRepository, "bulk_upsert", side_effect=DatabaseError("value too long")), \
+                mock.patch.object(ComicRepository, "upsert_from_parsed", side_effect=upsert_row):
+            self.assertEqual(Command().flush_batch(batch), (2, 1))
+        self.assertEqual(sorted(Comic.objects.values_list("bl_record_id", flat=True)), ["1", "2"])
+        self.assertEqual(list(Comic.objects.get(bl_record_id="2").author_values.values_list("name", flat=True)), ["Alice"])
+
+class FakeUniversalDetector:
+    """Incremental detector that is only sure after seeing two blocks."""
+    def __init__(self):
+        self.blocks = 0
+        self.done = False
+        self.result = {}
+
+    def feed(self, data):
+        self.blocks += 1
+        self.done = self.blocks >= 2
+
+    def close(self):
+        self.result = {"encoding": "ISO-8859-1", "confidence": 0.9}
+
+class TestDetectEncoding(SimpleTestCase):
+    def detect(self, data, detected=None, sample_size=16, incremental=True):
+        fake = SimpleNamespace(detect=lambda sample: detected)
+        if incremental:  # charset_normalizer has no UniversalDetector
+            fake.UniversalDetector = FakeUniversalDetector
+        fh = io.BytesIO(data)
+        with mock.patch("encyclopedia.management.commands.import_comics._det", fake):
+            return detect_encoding(fh, sample_size=sample_size), fh.tell()
+
+    def test_bom_means_utf8_sig(self):
+        self.assertEqual(self.detect(codecs.BOM_UTF8 + "Kéb".encode())[0], ("utf-8-sig", 1.0))
+
+    def test_ascii_and_utf8_samples_skip_detection(self):
+        self.assertEqual(self.detect(b"BL record ID,Title")[0], ("utf-8", 1.0))
+        # The sample may end halfway through a multi-byte character
+        self.assertEqual(self.detect("Astérix é".encode(), sample_size=10)[0], ("utf-8", 1.0))
+
+    def test_confident_detection_is_used_as_is(self):
+        result, _ = self.detect("Astérix".encode("cp1252"), {"encoding": "windows-1252", "confidence": 0.8})
+        self.assertEqual(result, ("windows-1252", 0.8))
+
+    def test_low_confidence_reads_on_until_the_detector_is_sure(self):
+        data = "Astérix ".encode("latin-1") * 10
+        result, read = self.detect(data, {"encoding": "cp1250", "confidence": 0.2})
+        self.assertEqual(result, ("ISO-8859-1", 0.9))
+        self.assertEqual(read, 32)  # the sample plus one more block
+
+    def test_unknown_codec_falls_back_to_cp1252(self):
+        data = "Astérix".encode("cp1252")
+        self.assertEqual(self.detect(data, {"encoding": "VISCII-X", "confidence": 0.9})[0], ("cp1252", 0))
+        self.assertEqual(self.detect(data, {"encoding": None, "confidence": None}, incremental=False)[0], ("utf-8", 0))
+
+NAMES_CSV = """\
+"BL record ID","Title","Name","Genre","Languages","Date of publication","Edition"
+"001","Watchmen","Moore, Alan ; Gibbons, Dave","Superhero comics","English","1987","First edition"
+"002","Maus","Spiegelman, Art","Biography","English ; German","1986",""
+"003","Broken","row","with","one","extra","field","here"
+"006","Short row"
+"004","Astérix le Gaulois","Goscinny, René","Humour","French","1961",""
+"001","Watchmen","Higgins, John","Superhero comics","English","1987","First edition"
+"005","Persepolis","Satrapi, Marjane","Biography","French","2000",""
+"""
+
+class TestReadFrames(SimpleTestCase):
+    def test_pyarrow_streams_blocks_and_parses_the_header_itself(self):
+        header = '"BL record\nID","Title"\n'  # quoted header spanning two lines
+        rows = "".join(f'"{n:09d}","Title {n}"\n' for n in range(40))
+        raw = io.BytesIO((header + rows + '"short"\n').encode("utf-16"))
+        bad_lines = []
+        with mock.patch("encyclopedia.management.commands.import_comics.READ_BUFFER_SIZE", 256):
+            frames = list(Command().read_frames(raw, "utf-16", 16, "pyarrow", bad_lines))
+        self.assertGreater(len(frames), 3)  # more blocks than batches of 16
+        self.assertEqual(list(frames[0].columns), ["BL record\nID", "Title"])
+        rows = [row for frame in frames for row in frame.itertuples(index=False, name=None)]
+        self.assertEqual(rows[:2], [("000000000", "Title 0"), ("000000001", "Title 1")])
+        self.assertEqual(rows[-1], ("short", ""))
+        self.assertEqual(len(rows), 41)
+        self.assertEqual(list(frames[-1].index)[-1], 40)
+        self.assertEqual(bad_lines, [])
+
+class TestImportCommand(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        Path(tmp.name, "names.csv").write_text(NAMES_CSV, encoding="utf-8")
+        cwd = os.getcwd()
+        os.chdir(tmp.name)
+        self.addCleanup(os.chdir, cwd)
+
+    def test_imports_with_every_engine_and_worker_count(self):
+        for engine in ["pandas", "pyarrow"]:
+            for workers in ["1", "2"]:
+                with self.subTest(engine=engine, workers=workers):
+                    Comic.objects.all().delete()
+                    out = io.StringIO()
+                    call_command("import_comics", "--engine", engine, "--workers", workers, "--batch-size", "3",
+                                 stdout=out)
+                    self.assertIn("Total records imported: 6", out.getvalue())
+                    # The row with extra fields; it sits inside the first of two batches
+                    self.assertIn("Total errors: 1", out.getvalue())
+                    self.assertEqual(sorted(Comic.objects.values_list("bl_record_id", flat=True)),
+                                     ["001", "002", "004", "005", "006"])
+                    # The short row is kept, with its missing fields blank
+                    short = Comic.objects.get(bl_record_id="006")
+                    self.assertEqual((short.title, short.authors, short.languages), ("Short row", [], []))
+                    watchmen = Comic.objects.get(bl_record_id="001")
+                    self.assertEqual(sorted(watchmen.author_values.values_list("name", flat=True)),
+                                     ["Gibbons, Dave", "Higgins, John", "Moore, Alan"])
+                    self.assertEqual(watchmen.other_fields["editions"], "First edition")
+                    self.assertEqual(list(Comic.objects.get(bl_record_id="004").language_values.values_list("name", flat=True)),
+                                     ["French"])
+                    biography = Genre.objects.get(name="Biography")
+                    self.assertEqual(sorted(biography.comics.values_list("bl_record_id", flat=True)), ["002", "005"])
@@ -1,8 +1,9 @@
 # encyclopedia/tests/test_integration.py
+from unittest import mock
 from django.test import TestCase, Client
 from django.urls import reverse
 from encyclopedia.models import Comic, SearchLog
-from encyclopedia.services import ComicSearchService
+from encyclopedia.services import ComicSearchService, clear_comic_caches
 
 class IntegrationTests(TestCase):
     """
@@ -55,6 +56,8 @@ class IntegrationTests(TestCase):
         )
         
         self.client = Client()
+        # TestCase never commits, so the on-commit cache clears of the writes above don't run
+        clear_comic_caches()
         self.search_service = ComicSearchService()
 
     def test_genre_filtering(self):
@@ -170,6 +173,14 @@ class IntegrationTests(TestCase):
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0].bl_record_id, "003")
 
+    def test_advanced_search_languages_field(self):
+        """Comma-separated languages are trimmed and blanks dropped."""
+        response = self.client.post(reverse('advanced_search'), {"languages": " French ,, ,English"})
+        self.assertEqual(sorted(c.bl_record_id for c in response.context['results']), ["001", "002", "003"])
+        response = self.client.post(reverse('advanced_search'), {"languages": " , "})
+        self.assertEqual(response.context['error_message'], "Please provide at least one search criterion.")
+        self.assertIsNone(response.context['search_params']['languages'])
+
     def test_search_logging_and_reports(self):
         """Test requirement: report on search queries and results."""
         # Perform some searches to generate logs
@@ -211,6 +222,61 @@ class IntegrationTests(TestCase):
         response = self.client.get(reverse('reports'))
         self.assertEqual(response.status_code, 200)
 
+    def test_browse_comics(self):
+        """Browse page: a cached count, one page of comics and one query per value sample."""
+        Comic.objects.filter(bl_record_id="003").delete()
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('browse_comics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_comics'], 2)
+        self.assertEqual(response.context['sample_authors'], ["Frank Miller", "Jack Kirby", "Stan Lee"])
+        self.assertEqual(response.context['sample_genres'], ["Adventure", "Drama", "Fantasy", "Horror"])
+        self.assertContains(response, 'Batman: The Dark Knight Returns')
+        # The total is cached until a comic is added or removed
+        with self.assertNumQueries(3):
+            self.client.get(reverse('browse_comics'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Comic.objects.create(bl_record_id="004", title="Maus")
+        self.assertEqual(self.client.get(reverse('browse_comics')).context['total_comics'], 3)
+
+    def test_detail_and_search_list_pages_run_no_per_comic_queries(self):
+        """Templates read only Comic columns, so neither page needs related lookups."""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('comic_detail', args=['001']))
+        self.assertContains(response, 'Stan Lee')
+        for bl_id in ["003", "001", "002"]:
+            self.client.post(reverse('save_to_search_list'), {"bl_id": bl_id})
+        with self.assertNumQueries(2):  # session, then every listed comic in one query
+            response = self.client.get(reverse('view_search_list'))
+        self.assertEqual([c.bl_record_id for c in response.context['comics']], ["003", "001", "002"])
+
+    def test_search_results_page_renders_without_loading_deferred_fields(self):
+        """SEARCH_RESULT_FIELDS covers every field the results template and grouping read."""
+        # The search, its log, then the session save: no per-comic loads
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('search'), {"group_by": "author"})
+        self.assertEqual(len(response.context['results']), 3)
+        self.assertContains(response, "Stan Lee")
+
+    def test_reports_are_cached(self):
+        """Report sections are reused until their TTL expires or a comic changes."""
+        self.search_service.search(title_query="Batman")
+        top_queries = self.client.get(reverse('reports')).context['top_queries']
+        self.assertEqual(len(top_queries), 1)
+        self.search_service.search(genre="Fantasy")
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('reports'))
+        self.assertEqual(response.context['top_queries'], top_queries)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comic.objects.create(bl_record_id="004", title="Maus")
+        self.assertEqual(len(self.client.get(reverse('reports')).context['top_queries']), 2)
+
+    def test_last_search_results_are_capped(self):
+        """Only the first LAST_SEARCH_RESULTS_LIMIT result ids are kept in the session."""
+        with mock.patch("encyclopedia.views.LAST_SEARCH_RESULTS_LIMIT", 2):
+            self.client.get(reverse('search'))
+        self.assertEqual(self.client.session["last_search_results"], ["002", "001"])
+
     def test_session_persistence(self):
         """Test that search results are cleared and program restored to initial state."""
         # Add items to session
@@ -1,6 +1,7 @@
 from django.test import TestCase
-from encyclopedia.parsers import parse_isbn
-from encyclopedia.services import GenreFilter, AuthorFilter
+from encyclopedia.parsers import build_column_index, parse_isbn, parse_row_to_record
+from encyclopedia.cleaning import clean_special_characters
+from encyclopedia.services import GenreFilter, AuthorFilter, EditionFilter
 from encyclopedia.models import Comic
 
 class TestParseISBN(TestCase):
@@ -17,6 +18,21 @@ class TestParseISBN(TestCase):
         self.assertEqual(parse_isbn(' , , '), ['missing'])
         self.assertEqual(parse_isbn(' , 978-1234567890 , '), ['978-1234567890'])
 
+class TestParseRow(TestCase):
+    def test_edition_and_name_type_keys(self):
+        header = ["BL record ID", "Title", "Edition", "Type of name", "Notes"]
+        record = parse_row_to_record(["1", "A", "2nd ed.", "person ; person", "n"], build_column_index(header))
+        self.assertEqual(record.other_fields, {"notes": "n", "editions": "2nd ed.", "name_type": ["person", "person"]})
+
+class TestCleanSpecialCharacters(TestCase):
+    def test_replacements(self):
+        self.assertEqual(clean_special_characters('Tom & Jerry @ 100%'), 'Tom and Jerry at 100 percent')
+        self.assertEqual(clean_special_characters('Hero™ «Saga»'), 'Hero trademark Saga')
+
+    def test_empty(self):
+        self.assertEqual(clean_special_characters(''), '')
+        self.assertIsNone(clean_special_characters(None))
+
 class TestGenreFilter(TestCase):
     def setUp(self):
         Comic.objects.create(bl_record_id='1', title='A', genres=['Fantasy'])
@@ -25,13 +41,13 @@ class TestGenreFilter(TestCase):
         self.filter = GenreFilter()
 
     def test_genre_filter(self):
-        filtered = self.filter.apply_filter(self.qs, 'Fantasy')
+        filtered = self.qs.filter(self.filter.build_q('Fantasy'))
         self.assertEqual(filtered.count(), 1)
         self.assertEqual(filtered.first().title, 'A')
-        filtered = self.filter.apply_filter(self.qs, 'Horror')
+        filtered = self.qs.filter(self.filter.build_q('Horror'))
         self.assertEqual(filtered.count(), 1)
         self.assertEqual(filtered.first().title, 'B')
-        filtered = self.filter.apply_filter(self.qs, '')
+        filtered = self.qs.filter(self.filter.build_q(''))
         self.assertEqual(filtered.count(), 2)
 
 class TestAuthorFilter(TestCase):
@@ -42,11 +58,18 @@ class TestAuthorFilter(TestCase):
         self.filter = AuthorFilter()
 
     def test_author_filter(self):
-        filtered = self.filter.apply_filter(self.qs, 'Alice')
+        filtered = self.qs.filter(self.filter.build_q('Alice'))
         self.assertEqual(filtered.count(), 1)
         self.assertEqual(filtered.first().title, 'A')
-        filtered = self.filter.apply_filter(self.qs, 'Bob')
+        filtered = self.qs.filter(self.filter.build_q('Bob'))
         self.assertEqual(filtered.count(), 1)
         self.assertEqual(filtered.first().title, 'B')
-        filtered = self.filter.apply_filter(self.qs, '')
+        filtered = self.qs.filter(self.filter.build_q(''))
         self.assertEqual(filtered.count(), 2)
+
+class TestEditionFilter(TestCase):
+    def test_matches_only_the_editions_key(self):
+        Comic.objects.create(bl_record_id='1', title='A', other_fields={'editions': 'Limited edition'})
+        Comic.objects.create(bl_record_id='2', title='B', other_fields={'notes': 'Limited edition'})
+        filtered = Comic.objects.filter(EditionFilter().build_q('limited'))
+        self.assertEqual([c.title for c in filtered], ['A'])
@@ -0,0 +1,131 @@
+from unittest import mock, skipUnless
+from django.db import DatabaseError, connection
+from django.db.backends.utils import CursorWrapper
+from django.test import TestCase, TransactionTestCase
+from encyclopedia.models import Author, Comic, SearchLog, sync_value_tables
+from encyclopedia.parsers import ParsedRecord
+from encyclopedia.repositories import ComicRepository
+
+class TestBulkUpsert(TestCase):
+    def test_inserts_new_records(self):
+        written = ComicRepository.bulk_upsert([
+            ParsedRecord(bl_record_id="1", title="A", authors=["Alice"]),
+            ParsedRecord(bl_record_id="2", title="B", authors=["Bob"]),
+        ])
+        self.assertEqual(written, 2)
+        self.assertEqual(Comic.objects.count(), 2)
+        self.assertEqual(Comic.objects.get(bl_record_id="1").authors, ["Alice"])
+
+    def test_merges_with_existing_rows(self):
+        Comic.objects.create(bl_record_id="1", title="A", authors=["Alice"], other_fields={"publisher": "X"})
+        ComicRepository.bulk_upsert([
+            ParsedRecord(bl_record_id="1", title="", authors=["Bob"], isbn=["123"], other_fields={"notes": "n"}),
+        ])
+        comic = Comic.objects.get(bl_record_id="1")
+        self.assertEqual(comic.title, "A")
+        self.assertEqual(comic.authors, ["Alice", "Bob"])
+        self.assertEqual(comic.isbn, ["123"])
+        self.assertEqual(comic.other_fields, {"publisher": "X", "notes": "n"})
+
+    def test_merges_duplicate_ids_within_batch(self):
+        written = ComicRepository.bulk_upsert([
+            ParsedRecord(bl_record_id="1", title="A", genres=["Fantasy"]),
+            ParsedRecord(bl_record_id="1", title="A2", genres=["Horror"]),
+        ])
+        self.assertEqual(written, 1)
+        comic = Comic.objects.get(bl_record_id="1")
+        self.assertEqual(comic.title, "A2")
+        self.assertEqual(comic.genres, ["Fantasy", "Horror"])
+
+class TestValueTables(TestCase):
+    def test_bulk_upsert_links_values(self):
+        ComicRepository.bulk_upsert([
+            ParsedRecord(bl_record_id="1", authors=["Moore, Alan", "Gibbons, Dave"], genres=["Drama"]),
+        ])
+        ComicRepository.bulk_upsert([ParsedRecord(bl_record_id="1", authors=["Moore, Alan"], genres=["Horror"])])
+        comic = Comic.objects.get(bl_record_id="1")
+        self.assertEqual(sorted(comic.author_values.values_list("name", flat=True)), ["Gibbons, Dave", "Moore, Alan"])
+        self.assertEqual(sorted(comic.genre_values.values_list("name", flat=True)), ["Drama", "Horror"])
+        self.assertEqual(Author.objects.count(), 2)
+
+    def test_save_links_values(self):
+        comic = Comic.objects.create(bl_record_id="1", title="A", languages=["English", "Français"])
+        self.assertEqual(sorted(comic.language_values.values_list("name", flat=True)), ["English", "Français"])
+        comic.languages = ["English"]
+        comic.save()
+        self.assertEqual(list(comic.language_values.values_list("name", flat=True)), ["English"])
+
+    def test_save_can_leave_the_sync_to_one_batched_call(self):
+        comics = [Comic(bl_record_id=str(n), title="A", authors=[f"Author {n}", "Shared"]) for n in range(5)]
+        for comic in comics:
+            comic.save(sync_values=False)
+        self.assertEqual(Author.objects.count(), 0)
+        # Batches of at most two comics, and of two author names per lookup
+        with mock.patch("encyclopedia.models.SQL_BATCH_SIZE", 2), self.assertNumQueries(33):
+            sync_value_tables([comic.bl_record_id for comic in comics])
+        self.assertEqual(Author.objects.count(), 6)
+        self.assertEqual(sorted(Comic.objects.get(bl_record_id="4").author_values.values_list("name", flat=True)),
+                         ["Author 4", "Shared"])
+
+class TestValueTableSyncIsAtomic(TransactionTestCase):
+    def test_failed_link_insert_rolls_back_the_save(self):
+        comic = Comic.objects.create(bl_record_id="1", title="A", authors=["Alice"])
+        comic.title, comic.authors = "B", ["Bob"]
+        with mock.patch.object(CursorWrapper, "executemany", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                comic.save()
+        comic = Comic.objects.get(bl_record_id="1")
+        self.assertEqual(comic.title, "A")
+        self.assertEqual(list(comic.author_values.values_list("name", flat=True)), ["Alice"])
+
+class TestFilterByGenre(TestCase):
+    def test_matches_whole_genre_values(self):
+        Comic.objects.create(bl_record_id="1", title="A", genres=["Horror", "Drama"])
+        Comic.objects.create(bl_record_id="2", title="B", genres=["Horror comics"])
+        self.assertEqual([c.bl_record_id for c in ComicRepository.filter_by_genre("Horror")], ["1"])
+
+class TestGroupByDb(TestCase):
+    def setUp(self):
+        Comic.objects.create(bl_record_id="2", title="B", authors=["Bob", "Alice"], publication_years=["1990"])
+        Comic.objects.create(bl_record_id="1", title="A", authors=["Alice"], publication_years=["1986"])
+        Comic.objects.create(bl_record_id="3", title="C", authors=["Carol"], publication_years=["1990"])
+
+    def test_group_by_author(self):
+        grouped = ComicRepository.group_by_author_db()
+        self.assertEqual(grouped, {"Alice": ["1", "2"], "Bob": ["2"], "Carol": ["3"]})
+        self.assertEqual(list(grouped), ["Alice", "Bob", "Carol"])
+
+    def test_group_by_year_of_queryset(self):
+        grouped = ComicRepository.group_by_year_db(Comic.objects.exclude(bl_record_id="3"))
+        self.assertEqual(grouped, {"1986": ["1"], "1990": ["2"]})
+
+class TestSearchResultCounts(TestCase):
+    def setUp(self):
+        for bl_id in ["1", "2", "3"]:
+            Comic.objects.create(bl_record_id=bl_id, title=bl_id)
+        SearchLog.objects.create(query_text="a", result_ids=["1", "2"], num_results=2)
+        SearchLog.objects.create(query_text="b", result_ids=["1"], num_results=1)
+        SearchLog.objects.create(query_text="c", result_ids=["1", "3"], num_results=2)
+
+    def test_counts_most_frequent_first(self):
+        counts = ComicRepository.count_search_result_ids(limit=1)
+        self.assertEqual(counts, [("1", 3)])
+
+    def test_threshold(self):
+        ids = {comic.bl_record_id for comic in ComicRepository.get_comics_in_many_searches(threshold=1)}
+        self.assertEqual(ids, {"1"})
+
+@skipUnless(connection.vendor == "postgresql", "COPY is PostgreSQL-only")
+class TestBulkCopyInsert(TestCase):
+    def test_copy_new_rows_and_upsert_existing(self):
+        Comic.objects.create(bl_record_id="1", title="A", authors=["Alice"])
+        written = ComicRepository.bulk_upsert([
+            ParsedRecord(bl_record_id="1", authors=["Bob"]),
+            ParsedRecord(bl_record_id="2", title="", authors=["Carol"], other_fields={"notes": "n"}),
+        ], use_copy=True)
+        self.assertEqual(written, 2)
+        self.assertEqual(Comic.objects.get(bl_record_id="1").authors, ["Alice", "Bob"])
+        comic = Comic.objects.get(bl_record_id="2")
+        self.assertEqual(comic.title, "")
+        self.assertEqual(comic.authors, ["Carol"])
+        self.assertEqual(comic.other_fields, {"notes": "n"})
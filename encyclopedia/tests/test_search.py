@@ -1,6 +1,19 @@
-from django.test import TestCase
-from encyclopedia.models import Comic
-from encyclopedia.services import ComicSearchService
+from unittest import mock
+from django.db import OperationalError
+from django.db.models import Q
+from django.test import TestCase, TransactionTestCase
+from encyclopedia.models import Comic, SearchLog
+from encyclopedia.services import (
+    DEFAULT_FILTERS, ComicSearchService, SearchFilterInterface, SearchLogWriter,
+    SearchResultCache, clear_comic_caches, search_result_cache,
+)
+
+class ExactTitleFilter(SearchFilterInterface):
+    def get_filter_name(self) -> str:
+        return "Exact Title"
+
+    def build_q(self, value) -> Q:
+        return Q(title=value)
 
 class SimpleSearchTests(TestCase):
     def setUp(self):
@@ -24,6 +37,8 @@ class SimpleSearchTests(TestCase):
             isbn=["missing"],
             other_fields={"editions": "Special"}
         )
+        # TestCase never commits, so the on-commit cache clears of the writes above don't run
+        clear_comic_caches()
         self.search_service = ComicSearchService()
 
     def test_basic_search_by_title(self):
@@ -41,3 +56,172 @@ class SimpleSearchTests(TestCase):
         multi = comic.get_multi_value_fields()
         self.assertIn("editions", multi)
         self.assertEqual(multi["editions"], ["First", "Second"])
+
+    def test_report_results_fetch_comics_in_one_query(self):
+        SearchLog.objects.create(query_text="a", result_ids=["A1", "A2", "gone"], num_results=3)
+        SearchLog.objects.create(query_text="b", result_ids=["A1", "A2"], num_results=2)
+        SearchLog.objects.create(query_text="c", result_ids=["A1"], num_results=1)
+        with self.assertNumQueries(2):
+            top = self.search_service.top_results()
+        self.assertEqual([(c.bl_record_id if c else None, n) for c, n in top], [("A1", 3), ("A2", 2), (None, 1)])
+        self.assertEqual(self.search_service.names_in_more_than_n_results(1), [("Gamma", 3), ("Delta", 2)])
+
+    def test_search_runs_one_select_and_one_log_insert(self):
+        with self.assertNumQueries(2):
+            results = self.search_service.search(title_query="Gamma", genre="Adventure")
+            self.assertEqual(results[0].get_multi_value_fields()["editions"], ["First", "Second"])
+        log = SearchLog.objects.get()
+        self.assertEqual(log.result_ids, ["A1"])
+        self.assertEqual(log.num_results, 1)
+
+    def test_grouping_search_results_runs_no_queries(self):
+        results = self.search_service.search()
+        with self.assertNumQueries(0):
+            by_author = self.search_service.group(results, by="author")
+            by_year = self.search_service.group(results, by="year")
+        self.assertEqual({k: [c.bl_record_id for c in v] for k, v in by_author.items()}, {"Bob": ["A2"], "Alice": ["A1"]})
+        self.assertEqual(set(by_year), {"2010", "2011"})
+
+    def test_search_values_returns_dicts_that_group_like_comics(self):
+        with self.assertNumQueries(2):
+            rows = self.search_service.search_values(fields=("title", "authors"), order="desc", genre="o")
+        self.assertEqual(rows, [{"bl_record_id": "A2", "title": "Delta", "authors": ["Bob"]}])
+        rows = self.search_service.search_values()
+        self.assertEqual([r["title"] for r in rows], ["Delta", "Gamma"])
+        self.assertEqual({k: [r["bl_record_id"] for r in v] for k, v in self.search_service.group(rows, by="year").items()},
+                         {"2011": ["A2"], "2010": ["A1"]})
+        self.assertEqual(SearchLog.objects.filter(query_text="empty_search").count(), 1)
+
+    def test_empty_search_skips_parameter_cleaning(self):
+        with mock.patch.object(ComicSearchService, "_clean_search_params") as clean:
+            results = self.search_service.search()
+        clean.assert_not_called()
+        self.assertEqual([c.bl_record_id for c in results], ["A2", "A1"])
+        self.assertEqual(SearchLog.objects.get().query_text, "empty_search")
+
+    def test_search_sorts_by_title_in_the_database(self):
+        Comic.objects.create(bl_record_id="A3", title="alpha")
+        asc = self.search_service.search(order="asc")
+        self.assertEqual([c.title for c in asc], ["alpha", "Delta", "Gamma"])
+        desc = self.search_service.search(order="desc")
+        self.assertEqual([c.title for c in desc], ["Gamma", "Delta", "alpha"])
+        self.assertEqual(self.search_service.sort_results(asc, "desc"), desc)
+
+    def test_clean_search_params(self):
+        cleaned = self.search_service._clean_search_params(
+            title=" Gamma ", genre="  ", author=None, languages=[" English", "", None, "  "], year=2010,
+        )
+        self.assertEqual(cleaned, {"title": "Gamma", "genre": None, "author": None, "languages": ["English"], "year": 2010})
+        self.assertIsNone(self.search_service._clean_search_params(languages=["", " "])["languages"])
+
+    def test_repeat_search_reuses_cached_ids_until_a_comic_changes(self):
+        self.assertEqual([c.bl_record_id for c in self.search_service.search(genre="Horror")], ["A2"])
+        # queryset.update() sends no signal, so the cached match survives it
+        Comic.objects.filter(bl_record_id="A2").update(genres=["Comedy"], title="Delta II")
+        cached = self.search_service.search(genre="Horror")
+        self.assertEqual([(c.bl_record_id, c.title) for c in cached], [("A2", "Delta II")])
+        # save() re-syncs A2's value tables with its new genres and clears the cache on commit
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Comic.objects.get(bl_record_id="A2").save()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.search_service.search(genre="Horror"), [])
+
+    def test_services_with_different_filters_do_not_share_cached_results(self):
+        exact = ComicSearchService(filters={**DEFAULT_FILTERS, "title": ExactTitleFilter()})
+        self.assertEqual({c.bl_record_id for c in self.search_service.search(title_query="a")}, {"A1", "A2"})
+        self.assertEqual(exact.search(title_query="a"), [])
+        self.assertEqual([c.bl_record_id for c in exact.search(title_query="Delta")], ["A2"])
+        self.assertEqual(self.search_service.search_values(title_query="Delta", fields=("title",)),
+                         [{"bl_record_id": "A2", "title": "Delta"}])
+        self.assertEqual(exact.search_values(title_query="a"), [])
+
+    def test_result_cache_lives_in_the_django_cache(self):
+        writer, reader = SearchResultCache(), SearchResultCache()
+        writer.set((("genre=Horror",), "asc"), ["A2"])
+        self.assertEqual(reader.get((("genre=Horror",), "asc")), ("A2",))
+        self.assertIsNone(reader.get((("genre=Horror",), "desc")))
+        writer.clear()
+        self.assertIsNone(reader.get((("genre=Horror",), "asc")))
+
+    def test_unfiltered_and_large_searches_are_not_cached(self):
+        with mock.patch.object(search_result_cache, "set") as cache_set:
+            self.search_service.search()
+            self.search_service.search_values()
+            with mock.patch("encyclopedia.services.SEARCH_CACHE_MAX_IDS", 1):
+                self.assertEqual(len(self.search_service.search(title_query="a")), 2)
+            cache_set.assert_not_called()
+            self.search_service.search(title_query="Delta")
+        cache_set.assert_called_once()
+
+    def test_multi_value_filters_match_single_values(self):
+        Comic.objects.create(bl_record_id="A3", title="Omega", authors=["Alan Moore", "Alan Davis"],
+                             genres=["Bande dessinée"])
+        self.assertEqual([c.bl_record_id for c in self.search_service.search(author="alan")], ["A3"])
+        self.assertEqual([c.bl_record_id for c in self.search_service.search(genre="dessinée")], ["A3"])
+        # Text spanning two list items is not a match
+        self.assertEqual(self.search_service.search(author='Moore", "Alan'), [])
+
+    def test_search_list_keeps_insertion_order_without_duplicates(self):
+        session = {"search_list": ["A2"]}  # list stored by an older session
+        for bl_id in ["A1", "A2", "A1"]:
+            self.search_service.add_to_search_list(session, bl_id)
+        self.assertEqual(list(session["search_list"]), ["A2", "A1"])
+        self.search_service.remove_from_search_list(session, "A2")
+        self.search_service.remove_from_search_list(session, "gone")
+        self.assertEqual([c.bl_record_id for c in self.search_service.get_search_list(session)], ["A1"])
+
+    def test_search_list_comes_back_in_add_order(self):
+        session = {}
+        for bl_id in ["A2", "gone", "A1"]:
+            self.search_service.add_to_search_list(session, bl_id)
+        with self.assertNumQueries(1):
+            comics = self.search_service.get_search_list(session)
+        self.assertEqual([c.bl_record_id for c in comics], ["A2", "A1"])
+
+    def test_search_list_changes_only_mark_the_session_when_needed(self):
+        session = self.client.session
+        self.search_service.add_to_search_list(session, "A1")
+        session.save()
+        session.modified = False
+        self.search_service.add_to_search_list(session, "A1")
+        self.search_service.remove_from_search_list(session, "gone")
+        self.assertFalse(session.modified)
+        self.search_service.remove_from_search_list(session, "A1")
+        self.assertTrue(session.modified)
+
+class SearchLogWriterTests(TransactionTestCase):
+    def test_buffers_until_flushed(self):
+        writer = SearchLogWriter(interval=60, synchronous=False)
+        writer.add(SearchLog(query_text="a", result_ids=["1"], num_results=1))
+        writer.add(SearchLog(query_text="b", result_ids=[], num_results=0))
+        self.assertEqual(SearchLog.objects.count(), 0)
+        writer.flush()
+        self.assertEqual(sorted(SearchLog.objects.values_list("query_text", flat=True)), ["a", "b"])
+
+    def test_synchronous_writer_writes_each_log_as_it_is_added(self):
+        writer = SearchLogWriter(interval=60, synchronous=True)
+        writer.add(SearchLog(query_text="a", result_ids=[], num_results=0))
+        self.assertEqual(SearchLog.objects.count(), 1)
+        self.assertIsNone(writer._thread)
+
+    def test_locked_database_is_retried_then_the_batch_is_dropped_and_logged(self):
+        writer = SearchLogWriter(synchronous=True)
+        bulk_create = SearchLog.objects.bulk_create
+        locked = OperationalError("database is locked")
+        attempts = iter([locked])
+
+        def locked_once(*args, **kwargs):
+            error = next(attempts, None)
+            if error:
+                raise error
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch("encyclopedia.services.time.sleep"):
+            with mock.patch.object(SearchLog.objects, "bulk_create", side_effect=locked_once) as insert:
+                writer.add(SearchLog(query_text="a", result_ids=[], num_results=0))
+            self.assertEqual(insert.call_count, 2)
+            with mock.patch.object(SearchLog.objects, "bulk_create", side_effect=locked), \
+                    self.assertLogs("encyclopedia.services", "WARNING") as logs:
+                writer.add(SearchLog(query_text="b", result_ids=[], num_results=0))
+        self.assertEqual(list(SearchLog.objects.values_list("query_text", flat=True)), ["a"])
+        self.assertIn("Dropped 1 search logs: 'b'", logs.output[0])
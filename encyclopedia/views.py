@@ -1,7 +1,11 @@
 # encyclopedia/views.py
+import re
+from django.core.cache import cache
 from django.shortcuts import render, redirect, get_object_or_404
-from .services import ComicSearchService
+from .services import COMIC_COUNT_CACHE_KEY, REPORT_CACHE_KEYS, REPORTS_CACHE_TTL, ComicSearchService
 from .models import Comic
+from .pagination import CachedCountPaginator
+from .repositories import ComicRepository
 from django.views.decorators.http import require_POST
 
 # SOLID PRINCIPLE: Dependency Injection (part of DIP)
@@ -9,6 +13,24 @@ from django.views.decorators.http import require_POST
 # This makes testing easier and follows the DIP principle
 search_service = ComicSearchService()
 
+# Most result ids kept in the session per search; sessions are re-saved whenever they change
+LAST_SEARCH_RESULTS_LIMIT = 500
+
+# Fields browse_comics.html renders
+BROWSE_FIELDS = ("bl_record_id", "title", "authors", "publication_years", "genres", "isbn")
+
+# One comma-separated language: trimmed, never blank
+LANGUAGE_TOKEN = re.compile(r"[^,\s](?:[^,]*[^,\s])?")
+
+def _remember_last_results(session, results):
+    """
+    Stores the first LAST_SEARCH_RESULTS_LIMIT result ids in the session.
+    An unchanged list is not reassigned, so a repeated search does not re-save the session.
+    """
+    ids = [c.bl_record_id for c in results[:LAST_SEARCH_RESULTS_LIMIT]]
+    if session.get("last_search_results") != ids:
+        session["last_search_results"] = ids
+
 def index(request):
     """
     SOLID SRP: Single Responsibility Principle - this view ONLY handles 
@@ -37,13 +59,13 @@ def search(request):
     languages = request.GET.getlist("languages")
     
     # SOLID DIP: Delegate business logic to service layer
-    results = search_service.search(title_query=q, genre=genre, author=author, year=year, languages=languages)
-    if order:
-        results = search_service.sort_results(results, order)
+    # Sorting happens in the search query itself
+    results = search_service.search(title_query=q, genre=genre, author=author, year=year,
+                                    languages=languages, order=order)
     groups = search_service.group(results, by=group_by) if group_by else None
     
     # Handle session management (view responsibility)
-    request.session["last_search_results"] = [c.bl_record_id for c in results]
+    _remember_last_results(request.session, results)
     context = {"results": results, "groups": groups, "query": q, "order": order, "group_by": group_by}
     return render(request, "search_results.html", context)
 
@@ -105,10 +127,8 @@ def advanced_search(request):
         edition = raw_data['edition'].strip() or None
         name_type = raw_data['name_type'].strip() or None
         
-        # Handle languages - split by comma and clean
-        languages = None
-        if raw_data['languages'].strip():
-            languages = [l.strip() for l in raw_data['languages'].split(",") if l.strip()]
+        # Handle languages - split by comma and clean, in one regex pass
+        languages = LANGUAGE_TOKEN.findall(raw_data['languages']) or None
         
         cleaned_data = {
             'author': author,
@@ -120,7 +140,7 @@ def advanced_search(request):
         }
         
         # Check if any search criteria provided
-        has_criteria = any(v for v in cleaned_data.values())
+        has_criteria = any(cleaned_data.values())
         
         if not has_criteria:
             # No search criteria provided - return empty results with message
@@ -145,7 +165,7 @@ def advanced_search(request):
 
             
             # Store results in session
-            request.session["last_search_results"] = [c.bl_record_id for c in results]
+            _remember_last_results(request.session, results)
             
             # Prepare context for template
             context = {
@@ -185,9 +205,12 @@ def reports(request):
     SOLID DIP: Dependency Inversion - delegates all reporting logic to service layer
     """
     # SOLID DIP: All business logic is handled by the service
-    top_queries = search_service.top_queries()
-    top_results = search_service.top_results()
-    high_freq = search_service.names_in_more_than_n_results(100)
+    # Reports are slow-moving stats, so each section is reused for REPORTS_CACHE_TTL seconds
+    top_queries = cache.get_or_set(REPORT_CACHE_KEYS["top_queries"], search_service.top_queries, REPORTS_CACHE_TTL)
+    top_results = cache.get_or_set(REPORT_CACHE_KEYS["top_results"], search_service.top_results, REPORTS_CACHE_TTL)
+    high_freq = cache.get_or_set(
+        REPORT_CACHE_KEYS["high_freq"], lambda: search_service.names_in_more_than_n_results(100), REPORTS_CACHE_TTL,
+    )
     return render(request, "reports.html", {"top_queries": top_queries, "top_results": top_results, "high_freq": high_freq})
 
 def view_search_list(request):
@@ -209,35 +232,23 @@ def browse_comics(request):
     SOLID OCP: Open/Closed - we could extend this with new browsing features
     without modifying the existing pagination logic
     """
-    from django.core.paginator import Paginator
+    # Get all comics ordered by title, loading only the fields the page shows
+    all_comics = Comic.objects.only(*BROWSE_FIELDS).order_by('title')
     
-    # Get all comics ordered by title
-    all_comics = Comic.objects.all().order_by('title')
-    
-    # Paginate results (50 per page)
-    paginator = Paginator(all_comics, 50)
+    # Paginate results (50 per page); the total is cached rather than counted on every page load
+    paginator = CachedCountPaginator(all_comics, 50, cache_key=COMIC_COUNT_CACHE_KEY)
     page_number = request.GET.get('page', 1)
     comics = paginator.get_page(page_number)
     
-    # Get some statistics for display
-    total_comics = Comic.objects.count()
-    sample_authors = Comic.objects.exclude(authors__exact=[]).values_list('authors', flat=True)[:100]
-    unique_authors = set()
-    for author_list in sample_authors:
-        if author_list:
-            unique_authors.update(author_list)
-    
-    sample_genres = Comic.objects.exclude(genres__exact=[]).values_list('genres', flat=True)[:100]
-    unique_genres = set()
-    for genre_list in sample_genres:
-        if genre_list:
-            unique_genres.update(genre_list)
+    # Get some statistics for display; the paginator already knows the total
+    total_comics = paginator.count
     
     context = {
         'comics': comics,
         'total_comics': total_comics,
-        'sample_authors': sorted(list(unique_authors))[:20],
-        'sample_genres': sorted(list(unique_genres))[:15],
+        # First names of the value tables, one indexed query each
+        'sample_authors': ComicRepository.value_names("author_values", 20),
+        'sample_genres': ComicRepository.value_names("genre_values", 15),
     }
     
     return render(request, "browse_comics.html", context)
@@ -246,8 +257,5 @@ from django.views.decorators.http import require_POST
 @require_POST
 def remove_from_search_list(request):
     bl_id = request.POST.get("bl_id")
-    search_list = request.session.get("search_list", [])
-    if bl_id in search_list:
-        search_list.remove(bl_id)
-        request.session["search_list"] = search_list
+    search_service.remove_from_search_list(request.session, bl_id)
     return redirect("view_search_list")